@@ -63,13 +63,13 @@ def generate_chapter(
         if now < expires_at:
             _cache_hits += 1
             _chapter_cache.move_to_end(cache_key)  # LRU: mark as recently used
-            logger.info(f"Chapter cache hit: {cache_key}")
+            logger.info("Chapter cache hit: %s", cache_key)
             return chapter
         # Expired entry — remove and regenerate
         del _chapter_cache[cache_key]
 
     _cache_misses += 1
-    logger.info(f"Generating chapter via GPT-4: {cache_key}")
+    logger.info("Generating chapter via GPT-4: %s", cache_key)
 
     from app.ai.openai_client import get_ai_client
     from app.ai.dynamic_prompt_builder import build_chapter_generation_prompt
@@ -81,7 +81,7 @@ def generate_chapter(
         raw = ai_client.generate_json_response(messages)
         chapter = _parse_chapter_json(raw, grade, subject, topic_id, topic_name)
     except Exception as exc:
-        logger.exception(f"Chapter generation failed for {cache_key}: {exc}")
+        logger.exception("Chapter generation failed for %s: %s", cache_key, exc)
         chapter = _make_fallback_chapter(grade, subject, topic_id, topic_name)
 
     # Evict oldest entry if at capacity
@@ -122,7 +122,7 @@ def _parse_chapter_json(
             ).strip()
         data = json.loads(cleaned)
     except json.JSONDecodeError as exc:
-        logger.error(f"JSON decode error: {exc} | snippet: {raw_json[:300]}")
+        logger.error("JSON decode error: %s | snippet: %s", exc, raw_json[:300])
         return _make_fallback_chapter(grade, subject, topic_id, topic_name)
 
     concepts: list[ConceptContent] = []
@@ -1,5 +1,17 @@
+import logging
+from functools import lru_cache
 from typing import List, Dict, Optional
-from app.models.lesson_content import PracticeQuestion
+from app.config import settings
+from app.models.lesson_content import Example, PracticeQuestion
+
+logger = logging.getLogger(__name__)
+
+# Caps on curriculum-supplied lists so prompt size stays bounded as content grows.
+MAX_KEY_POINTS = 6
+MAX_EXAMPLES = 2
+
+# Per-turn data beyond this size usually means oversized curriculum input.
+MAX_USER_PROMPT_CHARS = 4000
 
 
 # =============================================================================
@@ -138,6 +150,67 @@ def get_system_prompt_for_grade(grade: int, subject: str = "") -> str:
     return prompt
 
 
+# Model tier per prompt kind. Short framing prompts (praise, hints, review and
+# mastery questions) go to the fast tier; teaching prompts stay on the main model.
+# Kinds not listed use settings.OPENAI_MODEL.
+PROMPT_MODEL_MAP: Dict[str, str] = {
+    "encouragement": settings.OPENAI_FAST_MODEL,
+    "hint": settings.OPENAI_FAST_MODEL,
+    "review": settings.OPENAI_FAST_MODEL,
+    "mastery": settings.OPENAI_FAST_MODEL,
+    "explanation": settings.OPENAI_MODEL,
+    "visual": settings.OPENAI_MODEL,
+}
+
+# Output budget per prompt kind, sized to each builder's stated word cap plus
+# room for emojis and markers. The JSON-mode kinds (visual, guided, independent)
+# also carry the {"narration_lines": [...]} wrapper — a reply cut off at the
+# limit is not valid JSON. Kinds not listed use settings.OPENAI_MAX_TOKENS.
+PROMPT_MAX_TOKENS: Dict[str, int] = {
+    "encouragement": 40,
+    "review": 60,
+    "mastery": 60,
+    "guided": 150,
+    "independent": 140,
+    "hint": 80,
+    "intro": 90,
+    "welcome": 160,
+    "explanation": 220,
+    "visual": 300,
+    "celebration": 240,
+}
+
+
+@lru_cache(maxsize=64)
+def _system_message(grade: int, subject: str) -> Dict[str, str]:
+    """
+    Shared system message for (grade, subject), built once per combination.
+    The OpenAI SDK only reads message dicts, so every builder returns this same
+    object — callers must not mutate it.
+    """
+    return {"role": "system", "content": get_system_prompt_for_grade(grade, subject)}
+
+
+def _instructed_messages(
+    grade: int,
+    subject: str,
+    instructions: str,
+    user_prompt: str,
+) -> List[Dict[str, str]]:
+    """
+    Assemble [system prompt, builder instructions, per-turn data].
+    Everything before the user message is constant for a given builder, so the
+    provider's prompt cache can reuse that prefix across turns and sessions.
+    """
+    if len(user_prompt) >= MAX_USER_PROMPT_CHARS:
+        logger.warning("Oversized prompt: %d chars of per-turn data", len(user_prompt))
+    return [
+        _system_message(grade, subject),
+        {"role": "system", "content": instructions},
+        {"role": "user", "content": user_prompt},
+    ]
+
+
 # =============================================================================
 # CHAPTER GENERATION PROMPT  (used by chapter_generator.py)
 # =============================================================================
@@ -157,8 +230,6 @@ def build_chapter_generation_prompt(
     age_range = get_grade_age_range(grade)
     is_arabic = subject.lower() == "arabic"
 
-    system = get_system_prompt_for_grade(grade, subject)
-
     content_lang = "Arabic" if is_arabic else "English"
     lang_note = (
         "ALL text — questions, answers, hints — must be written in Arabic."
@@ -173,14 +244,18 @@ Subject: {subject.title()}
 Topic: {topic_name}
 Content language: {content_lang}
 {lang_note}
+"""
 
-Return ONLY valid JSON (no markdown, no explanation) matching this exact schema:
+    return _instructed_messages(grade, subject, _CHAPTER_GENERATION_INSTRUCTIONS, user_prompt)
 
-{{
+
+_CHAPTER_GENERATION_INSTRUCTIONS = """Return ONLY valid JSON (no markdown, no explanation) matching this exact schema:
+
+{
   "chapter_title": "engaging title",
   "welcome_message": "warm welcome (2-3 sentences, age-appropriate)",
   "concepts": [
-    {{
+    {
       "concept_id": "concept_1",
       "concept_name": "name of sub-concept",
       "learning_objective": "what the child will learn",
@@ -189,53 +264,48 @@ Return ONLY valid JSON (no markdown, no explanation) matching this exact schema:
       "introduction": "brief exciting intro (1-2 sentences)",
       "explanation": "clear concept explanation (3-5 sentences, age-appropriate)",
       "guided_questions": [
-        {{
+        {
           "question": "question text with emojis",
           "expected_answer": "exact answer",
           "acceptable_answers": ["var1", "var2", "var3"],
           "hint": "helpful hint without giving away the answer"
-        }},
-        {{
+        },
+        {
           "question": "...",
           "expected_answer": "...",
           "acceptable_answers": ["..."],
           "hint": "..."
-        }}
+        }
       ],
       "independent_questions": [
-        {{ "question": "...", "expected_answer": "...", "acceptable_answers": ["..."], "hint": "..." }},
-        {{ "question": "...", "expected_answer": "...", "acceptable_answers": ["..."], "hint": "..." }},
-        {{ "question": "...", "expected_answer": "...", "acceptable_answers": ["..."], "hint": "..." }}
+        { "question": "...", "expected_answer": "...", "acceptable_answers": ["..."], "hint": "..." },
+        { "question": "...", "expected_answer": "...", "acceptable_answers": ["..."], "hint": "..." },
+        { "question": "...", "expected_answer": "...", "acceptable_answers": ["..."], "hint": "..." }
       ],
       "mastery_question": "final check question",
       "mastery_answer": "exact answer",
       "mastery_acceptable": ["var1", "var2"]
-    }}
+    }
   ],
   "review_questions": [
-    {{ "question": "...", "expected_answer": "...", "acceptable_answers": ["..."], "hint": "..." }},
-    {{ "question": "...", "expected_answer": "...", "acceptable_answers": ["..."], "hint": "..." }},
-    {{ "question": "...", "expected_answer": "...", "acceptable_answers": ["..."], "hint": "..." }},
-    {{ "question": "...", "expected_answer": "...", "acceptable_answers": ["..."], "hint": "..." }}
+    { "question": "...", "expected_answer": "...", "acceptable_answers": ["..."], "hint": "..." },
+    { "question": "...", "expected_answer": "...", "acceptable_answers": ["..."], "hint": "..." },
+    { "question": "...", "expected_answer": "...", "acceptable_answers": ["..."], "hint": "..." },
+    { "question": "...", "expected_answer": "...", "acceptable_answers": ["..."], "hint": "..." }
   ],
   "completion_message": "celebration message for completing the topic"
-}}
+}
 
 REQUIREMENTS:
 - Exactly 5 concepts that build logically on each other
 - Each concept: exactly 2 guided_questions and exactly 3 independent_questions
 - Exactly 4 review_questions
-- Questions must be age-appropriate for {age_range} year olds
+- Questions must be age-appropriate for the stated age
 - Use emojis in questions to make them engaging
 - acceptable_answers must include common variations and misspellings
 - Hints should guide without giving away the answer
 """
 
-    return [
-        {"role": "system", "content": system},
-        {"role": "user", "content": user_prompt},
-    ]
-
 
 # =============================================================================
 # SYSTEM PROMPT  (original — kept for static Grade 2 Math path)
@@ -288,8 +358,12 @@ WELCOME SCRIPT (follow this):
 
 CHAPTER OVERVIEW:
 {chapter_overview}
+"""
 
-YOUR TASK:
+    return _instructed_messages(grade, subject, _WELCOME_INSTRUCTIONS, user_prompt)
+
+
+_WELCOME_INSTRUCTIONS = """YOUR TASK:
 1. Greet the child warmly with a fun, varied greeting
 2. Tell them WHAT they'll learn today (exciting! make them curious!)
 3. Build anticipation — "This is going to be SO cool!"
@@ -305,11 +379,6 @@ RULES:
 ✅ Voice-friendly (will be spoken aloud)
 """
 
-    return [
-        {"role": "system", "content": get_system_prompt_for_grade(grade, subject)},
-        {"role": "user", "content": user_prompt}
-    ]
-
 
 # =============================================================================
 # CONCEPT TEACHING PROMPTS
@@ -329,8 +398,12 @@ LEARNING GOAL: {learning_objective}
 
 INTRODUCTION SCRIPT (follow this):
 {introduction_script}
+"""
 
-YOUR TASK:
+    return _instructed_messages(grade, subject, _CONCEPT_INTRODUCTION_INSTRUCTIONS, user_prompt)
+
+
+_CONCEPT_INTRODUCTION_INSTRUCTIONS = """YOUR TASK:
 1. Transition with excitement (VARY it — not always "Now let's learn something new!")
 2. Name the concept simply and tell them WHY it's cool/useful
 3. Build curiosity and excitement
@@ -346,25 +419,20 @@ RULES:
 ✅ MUST end with an engaging question
 """
 
-    return [
-        {"role": "system", "content": get_system_prompt_for_grade(grade, subject)},
-        {"role": "user", "content": user_prompt}
-    ]
-
 
 def build_explanation_prompt(
     concept_name: str,
     explanation_script: str,
     key_points: List[str],
-    examples: List[Dict[str, str]],
+    examples: List[Example],
     grade: int = 2,
     subject: str = "",
 ) -> List[Dict[str, str]]:
-    key_points_text = "\n".join([f"- {point}" for point in key_points])
-
-    examples_text = ""
-    for ex in examples[:2]:
-        examples_text += f"\nExample: {ex['problem']} → {ex['solution']}\nHow to explain: {ex['explanation']}\n"
+    key_points_text = "\n".join(f"- {point}" for point in key_points[:MAX_KEY_POINTS])
+    examples_text = "".join(
+        f"\nExample: {ex.problem} → {ex.solution}\nHow to explain: {ex.explanation}\n"
+        for ex in examples[:MAX_EXAMPLES]
+    )
 
     user_prompt = f"""TEACH this concept in detail!
 
@@ -378,8 +446,12 @@ KEY POINTS TO COVER:
 
 EXAMPLES TO USE:
 {examples_text}
+"""
 
-YOUR TASK:
+    return _instructed_messages(grade, subject, _EXPLANATION_INSTRUCTIONS, user_prompt)
+
+
+_EXPLANATION_INSTRUCTIONS = """YOUR TASK:
 1. Start with varied enthusiasm (NOT always "Let me explain!")
 2. Teach the concept step by step using 1-2 key points max
 3. Give one simple, relatable real-world example
@@ -396,11 +468,6 @@ RULES:
 ✅ MUST end with a question the child can answer
 """
 
-    return [
-        {"role": "system", "content": get_system_prompt_for_grade(grade, subject)},
-        {"role": "user", "content": user_prompt}
-    ]
-
 
 def build_visual_explanation_prompt(
     concept_name: str,
@@ -413,14 +480,18 @@ def build_visual_explanation_prompt(
 
 CONCEPT: "{concept_name}"
 
-IMAGE TO GENERATE:
-[GENERATE_IMAGE: {visual_description}]
+PICTURE SHOWN:
+{visual_description}
 
 HOW TO EXPLAIN THE IMAGE:
 {visual_explanation}
+"""
 
-YOUR TASK:
-1. Generate the image (use the marker above)
+    return _instructed_messages(grade, subject, _VISUAL_EXPLANATION_INSTRUCTIONS, user_prompt)
+
+
+_VISUAL_EXPLANATION_INSTRUCTIONS = """YOUR TASK:
+1. The PICTURE SHOWN appears next to your words — talk about it
 2. Introduce the picture with enthusiasm (vary the opening!)
 3. Point out 2-3 key things to notice
 4. Connect what they see to the concept
@@ -429,33 +500,30 @@ YOUR TASK:
    OR "Can you tell me what you see? 🌟"
    OR "What do you think is happening here? 🤔"
 
-FORMAT:
-"[GENERATE_IMAGE: {visual_description}]
-
-[Excited intro about the picture!]
-
-[Point out 2-3 things naturally]
-
-[Observation question for the child]"
+FORMAT — reply with a JSON object only:
+{"narration_lines": ["<excited intro about the picture>", "<2-3 things to notice>", "<observation question>"]}
 
 RULES:
-✅ MUST include [GENERATE_IMAGE: ...]
 ✅ 3-4 varied emojis
 ✅ Simple, conversational explanation
 ✅ Under 80 words
 ✅ MUST end with a question
 """
 
-    return [
-        {"role": "system", "content": get_system_prompt_for_grade(grade, subject)},
-        {"role": "user", "content": user_prompt}
-    ]
-
 
 # =============================================================================
 # PRACTICE PROMPTS
 # =============================================================================
 
+@lru_cache(maxsize=512)
+def _picture_line(image_prompt: Optional[str]) -> str:
+    """PICTURE line for a practice prompt; chapters reuse image prompts across questions."""
+    return f"\nPICTURE: {image_prompt}" if image_prompt else ""
+
+
+_GUIDED_TRANSITIONS = ("Let's practice together! 🤝", "Great! Let's try another one! ✨")
+
+
 def build_guided_practice_prompt(
     question: PracticeQuestion,
     concept_name: str,
@@ -465,11 +533,9 @@ def build_guided_practice_prompt(
 ) -> List[Dict[str, str]]:
     """Guided practice - teacher helps"""
     
-    transition = "Let's practice together! 🤝" if is_first else "Great! Let's try another one! ✨"
+    transition = _GUIDED_TRANSITIONS[0] if is_first else _GUIDED_TRANSITIONS[1]
     
-    image_instruction = ""
-    if question.image_prompt:
-        image_instruction = f"\n[GENERATE_IMAGE: {question.image_prompt}]"
+    image_instruction = _picture_line(question.image_prompt)
     
     user_prompt = f"""GUIDED PRACTICE - Help the child answer!
 
@@ -477,21 +543,21 @@ CONCEPT: "{concept_name}"
 QUESTION: "{question.question_text}"
 EXPECTED ANSWER: "{question.expected_answer}"
 HINT IF NEEDED: "{question.hint_text}"
+TRANSITION: "{transition}"{image_instruction}
+"""
 
-YOUR TASK:
-1. Transition: "{transition}"
-2. Show image if needed{image_instruction}
+    return _instructed_messages(grade, subject, _GUIDED_PRACTICE_INSTRUCTIONS, user_prompt)
+
+
+_GUIDED_PRACTICE_INSTRUCTIONS = """YOUR TASK:
+1. Open with the TRANSITION line
+2. If a PICTURE is given, it appears next to your words — refer to it
 3. Ask the question clearly
 4. Offer to help: "Let's figure it out together! 😊"
 5. Wait for answer
 
-FORMAT:
-"{transition}
-{image_instruction}
-
-[Ask the question clearly]
-
-What do you think? 🤔🌟"
+FORMAT — reply with a JSON object only:
+{"narration_lines": ["<TRANSITION>", "<the question, asked clearly>", "What do you think? 🤔🌟"]}
 
 RULES:
 ✅ 2-3 emojis
@@ -500,11 +566,6 @@ RULES:
 ✅ Under 40 words
 """
 
-    return [
-        {"role": "system", "content": get_system_prompt_for_grade(grade, subject)},
-        {"role": "user", "content": user_prompt}
-    ]
-
 
 def build_independent_practice_prompt(
     question: PracticeQuestion,
@@ -516,30 +577,27 @@ def build_independent_practice_prompt(
 ) -> List[Dict[str, str]]:
     """Independent practice - child tries alone"""
     
-    image_instruction = ""
-    if question.image_prompt:
-        image_instruction = f"\n[GENERATE_IMAGE: {question.image_prompt}]"
+    image_instruction = _picture_line(question.image_prompt)
     
     user_prompt = f"""INDEPENDENT PRACTICE - Child tries alone!
 
 CONCEPT: "{concept_name}"
 QUESTION {question_number} of {total_questions}: "{question.question_text}"
-EXPECTED ANSWER: "{question.expected_answer}"
+EXPECTED ANSWER: "{question.expected_answer}"{image_instruction}
+"""
 
-YOUR TASK:
+    return _instructed_messages(grade, subject, _INDEPENDENT_PRACTICE_INSTRUCTIONS, user_prompt)
+
+
+_INDEPENDENT_PRACTICE_INSTRUCTIONS = """YOUR TASK:
 1. Encourage: "Your turn! You've got this! 💪"
-2. Show image if needed{image_instruction}
+2. If a PICTURE is given, it appears next to your words — refer to it
 3. Ask the question clearly
 4. Express confidence in them
 5. Wait for answer
 
-FORMAT:
-"Your turn! Question {question_number}! 🌟
-{image_instruction}
-
-[Ask the question]
-
-I know you can do it! 💪😊"
+FORMAT — reply with a JSON object only:
+{"narration_lines": ["Your turn! Question <question number>! 🌟", "<the question>", "I know you can do it! 💪😊"]}
 
 RULES:
 ✅ 2-3 emojis
@@ -548,11 +606,6 @@ RULES:
 ✅ Under 35 words
 """
 
-    return [
-        {"role": "system", "content": get_system_prompt_for_grade(grade, subject)},
-        {"role": "user", "content": user_prompt}
-    ]
-
 
 def build_mastery_check_prompt(
     concept_name: str,
@@ -566,8 +619,12 @@ def build_mastery_check_prompt(
 
 CONCEPT: "{concept_name}"
 CHECK QUESTION: "{question}"
+"""
 
-YOUR TASK:
+    return _instructed_messages(grade, subject, _MASTERY_CHECK_INSTRUCTIONS, user_prompt)
+
+
+_MASTERY_CHECK_INSTRUCTIONS = """YOUR TASK:
 1. Transition: "One last check before we move on! 🎯"
 2. Ask the mastery question
 3. Express that you believe in them
@@ -576,7 +633,7 @@ YOUR TASK:
 FORMAT:
 "One last check! 🎯✨
 
-{question}
+[CHECK QUESTION]
 
 Show me what you learned! 🌟"
 
@@ -586,11 +643,6 @@ RULES:
 ✅ Under 25 words
 """
 
-    return [
-        {"role": "system", "content": get_system_prompt_for_grade(grade, subject)},
-        {"role": "user", "content": user_prompt}
-    ]
-
 
 # =============================================================================
 # REVIEW AND CELEBRATION
@@ -609,16 +661,20 @@ def build_chapter_review_prompt(
 
 REVIEW QUESTION {question_number} of {total_questions}: "{question.question_text}"
 EXPECTED: "{question.expected_answer}"
+"""
 
-YOUR TASK:
+    return _instructed_messages(grade, subject, _CHAPTER_REVIEW_INSTRUCTIONS, user_prompt)
+
+
+_CHAPTER_REVIEW_INSTRUCTIONS = """YOUR TASK:
 1. Frame as review: "Review time! 📝"
 2. Ask the question
 3. Wait for answer
 
 FORMAT:
-"Review question {question_number}! 📝🌟
+"Review question [question number]! 📝🌟
 
-{question.question_text}
+[REVIEW QUESTION]
 
 You remember this! 😊"
 
@@ -628,11 +684,6 @@ RULES:
 ✅ Under 20 words
 """
 
-    return [
-        {"role": "system", "content": get_system_prompt_for_grade(grade, subject)},
-        {"role": "user", "content": user_prompt}
-    ]
-
 
 def build_celebration_prompt(
     completion_script: str,
@@ -651,8 +702,12 @@ COMPLETION SCRIPT (follow this):
 STATS:
 - Correct answers: {total_correct}
 - Total questions: {total_questions}
+"""
 
-YOUR TASK:
+    return _instructed_messages(grade, subject, _CELEBRATION_INSTRUCTIONS, user_prompt)
+
+
+_CELEBRATION_INSTRUCTIONS = """YOUR TASK:
 1. BIG celebration! 🎉🥳👏
 2. List what they learned
 3. Tell them you're proud
@@ -677,11 +732,6 @@ RULES:
 ✅ Warm and genuine
 """
 
-    return [
-        {"role": "system", "content": get_system_prompt_for_grade(grade, subject)},
-        {"role": "user", "content": user_prompt}
-    ]
-
 
 # =============================================================================
 # FEEDBACK PROMPTS
@@ -694,7 +744,7 @@ def build_encouragement_prompt(
     subject: str = "",
     child_transcript: str = "",
 ) -> List[Dict[str, str]]:
-    phrases_text = "\n".join([f'- "{phrase}"' for phrase in encouragement_phrases[:3]])
+    phrases_text = "\n".join(f'- "{phrase}"' for phrase in encouragement_phrases[:3])
 
     transcript_note = ""
     if child_transcript.strip():
@@ -710,8 +760,12 @@ Never give a generic response when you know what they said."""
 
 SUGGESTED PHRASES (pick one OR create a fresh one — vary it every time!):
 {phrases_text}
+"""
+
+    return _instructed_messages(grade, subject, _ENCOURAGEMENT_INSTRUCTIONS, user_prompt)
 
-ALSO CONSIDER these celebration styles (rotate through them):
+
+_ENCOURAGEMENT_INSTRUCTIONS = """ALSO CONSIDER these celebration styles (rotate through them):
 - "You got it! ⭐ That's exactly right!"
 - "Brilliant! 🚀 I knew you could do it!"
 - "Wow, you're so smart! 🏆 Perfect answer!"
@@ -723,7 +777,7 @@ ALSO CONSIDER these celebration styles (rotate through them):
 - "Oh! You said [their exact words] — that's EXACTLY right! 🎯"
 
 YOUR TASK:
-1. Reference what the child specifically said (if provided above)
+1. Reference what the child specifically said (if provided)
 2. Pick a celebration style that you haven't used yet (VARY it!)
 3. Keep it short, genuine, and exciting
 4. Use 3-5 varied emojis that match the energy
@@ -739,10 +793,25 @@ RULES:
 ✅ NEVER repeat the exact same phrase as before
 """
 
-    return [
-        {"role": "system", "content": get_system_prompt_for_grade(grade, subject)},
-        {"role": "user", "content": user_prompt}
-    ]
+
+_SILENCE_NOTE = """
+SILENCE HANDLING (vary these approaches):
+- "Are you still there? 🌟 Take all the time you need!"
+- "I'm right here waiting! 🤗 No rush at all!"
+- "It's okay to think! 🤔 What's going through your mind?"
+- "Would you like a little hint? Just say 'hint' and I'll help! 💡"
+"""
+
+_EXTRA_HELP_NOTE = """
+EXTRA SUPPORT MODE — child is struggling, be EXTRA patient:
+- Break the problem into the tiniest possible steps
+- Use a real-world analogy they know
+- Offer to "figure it out together"
+- Be extra warm and reassuring
+"""
+
+# Indexed by attempt: <=1, 2, 3+
+_HINT_INTENSITY = ("very gentle", "clearer with more help", "very direct with strong clue")
 
 
 def build_hint_prompt(
@@ -758,29 +827,14 @@ def build_hint_prompt(
     if is_silence:
         situation = "The child has been quiet and needs a gentle, patient nudge."
         response_type = "patient encouragement"
-        silence_note = """
-SILENCE HANDLING (vary these approaches):
-- "Are you still there? 🌟 Take all the time you need!"
-- "I'm right here waiting! 🤗 No rush at all!"
-- "It's okay to think! 🤔 What's going through your mind?"
-- "Would you like a little hint? Just say 'hint' and I'll help! 💡"
-"""
+        silence_note = _SILENCE_NOTE
     else:
         situation = f"The child said '{child_answer}' — the expected answer is '{expected_answer}'."
         response_type = "supportive hint"
         silence_note = ""
 
-    intensity = "very gentle" if attempt_count <= 1 else "clearer with more help" if attempt_count <= 2 else "very direct with strong clue"
-
-    extra_help_instruction = ""
-    if needs_extra_help:
-        extra_help_instruction = """
-EXTRA SUPPORT MODE — child is struggling, be EXTRA patient:
-- Break the problem into the tiniest possible steps
-- Use a real-world analogy they know
-- Offer to "figure it out together"
-- Be extra warm and reassuring
-"""
+    intensity = _HINT_INTENSITY[min(max(attempt_count, 1), 3) - 1]
+    extra_help_instruction = _EXTRA_HELP_NOTE if needs_extra_help else ""
 
     user_prompt = f"""Give a {response_type}!
 
@@ -789,8 +843,12 @@ HINT TO USE: "{hint_text}"
 ATTEMPT NUMBER: {attempt_count + 1}
 HINT STRENGTH: {intensity}
 {silence_note}{extra_help_instruction}
+"""
 
-YOUR TASK:
+    return _instructed_messages(grade, subject, _HINT_INSTRUCTIONS, user_prompt)
+
+
+_HINT_INSTRUCTIONS = """YOUR TASK:
 1. NEVER say "wrong", "incorrect", "no", or "that's not right"
 2. Acknowledge their effort warmly (VARY the opening — not always "Good try!")
    Try: "Hmm, interesting thought! 🤔", "I like how you're thinking! 😊", "Great effort! 💪"
@@ -804,8 +862,3 @@ RULES:
 ✅ Under 40 words
 ✅ End with a question or prompt to try again
 """
-
-    return [
-        {"role": "system", "content": get_system_prompt_for_grade(grade, subject)},
-        {"role": "user", "content": user_prompt}
-    ]
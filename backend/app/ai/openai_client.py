@@ -2,9 +2,15 @@
 OpenAI Client for Learno Educational Backend
 """
 
+import hashlib
+import json
 import logging
-from typing import List, Dict, Optional
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import AsyncIterator, List, Dict, Optional
 
+import httpx
 import openai
 
 from app.config import settings
@@ -12,6 +18,47 @@ from app.utils.exceptions import AIServiceError
 
 logger = logging.getLogger(__name__)
 
+# One pooled HTTP client per LearnoAIClient: keep-alive connections skip the
+# TCP+TLS handshake on every call, and the caps bound concurrent OpenAI requests.
+# Transient failures (429, connection errors, 5xx) are retried inside the SDK
+# with jittered exponential backoff, honouring Retry-After, before any
+# AIServiceError reaches the caller; auth errors are never retried.
+_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+_HTTP_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+
+# Replies kept for cacheable prompts (welcome, concept intro, celebration) —
+# their inputs are shared by every child on the same chapter.
+_RESPONSE_CACHE_MAX_SIZE = 2048
+
+# OpenAI failures reported to callers, checked in order — APITimeoutError is a
+# subclass of APIConnectionError, so it must come first.
+_OPENAI_ERROR_MESSAGES = (
+    (openai.AuthenticationError, "Invalid OpenAI API key"),
+    (openai.RateLimitError, "OpenAI rate limit exceeded"),
+    (openai.APITimeoutError, "OpenAI request timed out"),
+    (openai.APIConnectionError, "Cannot reach OpenAI servers"),
+    (openai.InternalServerError, "OpenAI server error — please retry"),
+)
+_MAPPED_OPENAI_ERRORS = tuple(error_type for error_type, _ in _OPENAI_ERROR_MESSAGES)
+
+
+def _as_ai_error(error: Exception) -> AIServiceError:
+    """The AIServiceError an OpenAI call failure is reported as."""
+    for error_type, message in _OPENAI_ERROR_MESSAGES:
+        if isinstance(error, error_type):
+            return AIServiceError(message)
+    logger.exception("OpenAI error")
+    return AIServiceError(f"OpenAI request failed: {str(error)}")
+
+
+@contextmanager
+def _openai_errors():
+    """Re-raise any failure inside the block as an AIServiceError."""
+    try:
+        yield
+    except Exception as e:
+        raise _as_ai_error(e) from e
+
 
 class LearnoAIClient:
     """OpenAI API wrapper"""
@@ -25,17 +72,75 @@ class LearnoAIClient:
         self.model = settings.OPENAI_MODEL
         self.max_tokens = settings.OPENAI_MAX_TOKENS
         self.temperature = settings.OPENAI_TEMPERATURE
-        openai.api_key = settings.OPENAI_API_KEY
-        logger.info(f"LearnoAIClient initialized with model: {self.model}")
-
-    def generate_response(self, messages: List[Dict[str, str]]) -> str:
-        """Generate response from OpenAI"""
-        try:
-            response = openai.chat.completions.create(
-                model=self.model,
+        self._client = openai.OpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            max_retries=settings.OPENAI_MAX_RETRIES,
+            http_client=httpx.Client(limits=_HTTP_LIMITS, http2=True, timeout=_HTTP_TIMEOUT),
+        )
+        self._async_client = openai.AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            max_retries=settings.OPENAI_MAX_RETRIES,
+            http_client=httpx.AsyncClient(limits=_HTTP_LIMITS, http2=True, timeout=_HTTP_TIMEOUT),
+        )
+        self._response_cache: "OrderedDict[str, str]" = OrderedDict()
+        # Route threads and the lesson prefetch pool share the cache
+        self._response_cache_lock = threading.Lock()
+        logger.info("LearnoAIClient initialized with model: %s", self.model)
+
+    def generate_response(
+        self,
+        messages: List[Dict[str, str]],
+        cacheable: bool = False,
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False,
+    ) -> str:
+        """Generate response from OpenAI.
+
+        With cacheable=True an identical prompt is answered from an in-memory LRU
+        instead of calling OpenAI again — only for prompts that need not vary.
+        `model` and `max_tokens` override the configured defaults for this call
+        (see PROMPT_MODEL_MAP / PROMPT_MAX_TOKENS). json_mode=True requests a
+        JSON object reply (the prompt itself must mention JSON).
+        """
+        model = model or self.model
+        max_tokens = max_tokens or self.max_tokens
+        if not cacheable:
+            return self._complete(messages, model, max_tokens, json_mode)
+
+        key = hashlib.blake2b(
+            json.dumps([model, max_tokens, json_mode, messages], sort_keys=True).encode(), digest_size=16
+        ).hexdigest()
+        with self._response_cache_lock:
+            cached = self._response_cache.get(key)
+            if cached is not None:
+                self._response_cache.move_to_end(key)  # LRU: mark as recently used
+                return cached
+
+        # The OpenAI call runs outside the lock so cache hits never wait on it
+        content = self._complete(messages, model, max_tokens, json_mode)
+        with self._response_cache_lock:
+            self._response_cache[key] = content
+            self._response_cache.move_to_end(key)
+            if len(self._response_cache) > _RESPONSE_CACHE_MAX_SIZE:
+                self._response_cache.popitem(last=False)
+        return content
+
+    def _complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        max_tokens: int,
+        json_mode: bool = False,
+    ) -> str:
+        extra = {"response_format": {"type": "json_object"}} if json_mode else {}
+        with _openai_errors():
+            response = self._client.chat.completions.create(
+                model=model,
                 messages=messages,
-                max_tokens=self.max_tokens,
+                max_tokens=max_tokens,
                 temperature=self.temperature,
+                **extra,
             )
 
             content = response.choices[0].message.content
@@ -44,24 +149,24 @@ class LearnoAIClient:
 
             return content.strip()
 
-        except openai.AuthenticationError:
-            raise AIServiceError("Invalid OpenAI API key")
-        except openai.RateLimitError:
-            raise AIServiceError("OpenAI rate limit exceeded")
-        except openai.APITimeoutError:
-            raise AIServiceError("OpenAI request timed out")
-        except openai.APIConnectionError:
-            raise AIServiceError("Cannot reach OpenAI servers")
-        except openai.InternalServerError:
-            raise AIServiceError("OpenAI server error — please retry")
-        except Exception as e:
-            logger.exception("OpenAI error")
-            raise AIServiceError(f"OpenAI request failed: {str(e)}")
+    async def stream_response(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        """Yield content deltas as OpenAI produces them — the first arrives long before the full reply."""
+        with _openai_errors():
+            stream = await self._async_client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
+                stream=True,
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
 
     def generate_json_response(self, messages: List[Dict[str, str]]) -> str:
         """Generate a JSON-structured response from OpenAI (used for chapter generation)."""
         try:
-            response = openai.chat.completions.create(
+            response = self._client.chat.completions.create(
                 model=self.model,
                 messages=messages,
                 max_tokens=4000,
@@ -72,27 +177,24 @@ class LearnoAIClient:
             if not content:
                 raise AIServiceError("Empty JSON response from OpenAI")
             return content.strip()
-        except openai.AuthenticationError:
-            raise AIServiceError("Invalid OpenAI API key")
-        except openai.RateLimitError:
-            raise AIServiceError("OpenAI rate limit exceeded")
-        except openai.APITimeoutError:
-            raise AIServiceError("OpenAI request timed out")
-        except openai.APIConnectionError:
-            raise AIServiceError("Cannot reach OpenAI servers")
-        except openai.InternalServerError:
-            raise AIServiceError("OpenAI server error — please retry")
+        except _MAPPED_OPENAI_ERRORS as e:
+            raise _as_ai_error(e) from e
         except Exception as e:
             # Fallback: try without response_format (older model versions)
-            logger.warning(f"JSON mode failed ({e}), retrying without response_format")
+            logger.warning("JSON mode failed (%s), retrying without response_format", e)
             return self.generate_response(messages)
 
 
 _ai_client: Optional[LearnoAIClient] = None
+_ai_client_lock = threading.Lock()
 
 
 def get_ai_client() -> LearnoAIClient:
+    """Process-wide client (one HTTP pool). Created at startup by main.lifespan;
+    the lock only matters if something calls this before startup finishes."""
     global _ai_client
     if _ai_client is None:
-        _ai_client = LearnoAIClient()
+        with _ai_client_lock:
+            if _ai_client is None:
+                _ai_client = LearnoAIClient()
     return _ai_client
@@ -14,11 +14,21 @@ class Settings:
 
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-4o")
+    # Cheaper/faster tier for short framing prompts (hints, praise, review questions)
+    OPENAI_FAST_MODEL: str = os.getenv("OPENAI_FAST_MODEL", "gpt-4o-mini")
     OPENAI_MAX_TOKENS: int = int(os.getenv("OPENAI_MAX_TOKENS", "700"))
     OPENAI_TEMPERATURE: float = float(os.getenv("OPENAI_TEMPERATURE", "0.85"))
+    # In-SDK retries for 429 / connection / 5xx errors (jittered backoff 0.5s → 8s)
+    OPENAI_MAX_RETRIES: int = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
 
     SESSION_TIMEOUT_SECONDS: int = int(os.getenv("SESSION_TIMEOUT_SECONDS", "1800"))
     SILENCE_THRESHOLD_SECONDS: int = int(os.getenv("SILENCE_THRESHOLD_SECONDS", "12"))
+    # In-memory session cap; the least recently used session is dropped beyond it
+    MAX_SESSIONS: int = int(os.getenv("MAX_SESSIONS", "10000"))
+    # How often the background sweep drops expired sessions
+    SESSION_REAP_INTERVAL_SECONDS: int = int(os.getenv("SESSION_REAP_INTERVAL_SECONDS", "60"))
+    # Generate every static chapter picture in the background at startup (costs DALL·E calls)
+    PREWARM_IMAGES: bool = os.getenv("PREWARM_IMAGES", "false").lower() == "true"
 
     API_VERSION: str = "v1"
     APP_TITLE: str = "Learno Educational Backend"
@@ -32,7 +42,11 @@ class Settings:
 
     # CORS — set ALLOWED_ORIGINS to a comma-separated list for production
     # e.g. ALLOWED_ORIGINS=https://app.learno.com,https://www.learno.com
-    ALLOWED_ORIGINS: list = os.getenv("ALLOWED_ORIGINS", "*").split(",")
+    ALLOWED_ORIGINS: frozenset = frozenset(
+        origin.strip()
+        for origin in os.getenv("ALLOWED_ORIGINS", "*").split(",")
+        if origin.strip()
+    )
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
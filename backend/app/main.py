@@ -11,15 +11,17 @@ Changes:
 =============================================================================
 """
 
+import asyncio
 import logging
 import os
 import time
 from contextlib import asynccontextmanager
 
+import orjson
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
@@ -30,6 +32,7 @@ from app.routes.auth_routes import router as auth_router
 from app.routes.children_routes import router as children_router
 from app.routes.parent_routes import router as parent_router
 from app.utils.exceptions import (
+    LearnoError,
     SessionNotFoundError,
     SessionExpiredError,
     InvalidInputError,
@@ -52,14 +55,50 @@ _start_time = time.time()
 from app.rate_limiter import limiter
 
 
+def _sweep_sessions():
+    from app.services.session_service import get_session_service
+    from app.services.conversational_lesson_service import prune_conversation_contexts
+    get_session_service().cleanup_expired()
+    # Expired and LRU-evicted sessions both leave their conversation context behind
+    prune_conversation_contexts()
+
+
+async def _reap_expired_sessions():
+    """Drop sessions nobody came back to; get_session only expires the ones it is asked for."""
+    while True:
+        await asyncio.sleep(settings.SESSION_REAP_INTERVAL_SECONDS)
+        try:
+            # The sweep takes the session-store lock, so keep it off the event loop
+            await asyncio.to_thread(_sweep_sessions)
+        except Exception:
+            logger.exception("Session sweep failed")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Build the shared OpenAI client (and its connection pool) before the first
+    # request rather than lazily under concurrent traffic.
+    from app.ai.openai_client import get_ai_client
+    try:
+        get_ai_client()
+    except AIServiceError as e:
+        logger.error("AI client not initialized at startup: %s", e)
+
+    # Fill the image cache for the static curriculum off the request path; the
+    # disk tier keeps the files across restarts, so later boots are cache hits.
+    if settings.PREWARM_IMAGES:
+        import threading
+        from app.services.dynamic_lesson_service import prewarm_chapter_images
+        threading.Thread(target=prewarm_chapter_images, name="image-prewarm", daemon=True).start()
+
     from app.database.session import engine
     from app.database.base import Base
     import app.auth.models  # noqa: F401 — register all models including analytics
     Base.metadata.create_all(bind=engine)
     logger.info("Learno backend started (v2.0.0)")
+    reaper = asyncio.create_task(_reap_expired_sessions())
     yield
+    reaper.cancel()
 
 
 app = FastAPI(
@@ -70,6 +109,7 @@ app = FastAPI(
     redoc_url="/redoc",
     openapi_url="/openapi.json",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 app.state.limiter = limiter
@@ -107,11 +147,12 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 _origins = settings.ALLOWED_ORIGINS
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=_origins,
+    allow_origins=sorted(_origins),
     # allow_credentials requires specific origins (not wildcard) per CORS spec.
     # When ALLOWED_ORIGINS is restricted in production, credentials work correctly.
     allow_credentials=("*" not in _origins),
-    allow_methods=["*"],
+    # Only the verbs the routers expose; preflights for anything else are rejected.
+    allow_methods=["GET", "POST", "PUT", "DELETE"],
     allow_headers=["*"],
 )
 
@@ -133,62 +174,26 @@ app.include_router(parent_router, prefix=API_PREFIX)
 # Exception Handlers
 # =============================================================================
 
-@app.exception_handler(SessionNotFoundError)
-async def session_not_found_handler(request: Request, exc: SessionNotFoundError):
-    return JSONResponse(
-        status_code=404,
-        content={
-            "status": "error",
-            "message": str(exc),
-            "state": "SESSION_NOT_FOUND"
-        }
-    )
-
-
-@app.exception_handler(SessionExpiredError)
-async def session_expired_handler(request: Request, exc: SessionExpiredError):
-    return JSONResponse(
-        status_code=410,
-        content={
-            "status": "error",
-            "message": str(exc),
-            "state": "SESSION_EXPIRED"
-        }
-    )
-
-
-@app.exception_handler(InvalidInputError)
-async def invalid_input_handler(request: Request, exc: InvalidInputError):
-    return JSONResponse(
-        status_code=400,
-        content={
-            "status": "error",
-            "message": str(exc),
-            "state": "INVALID_INPUT"
-        }
-    )
-
-
-@app.exception_handler(LessonNotAvailableError)
-async def lesson_not_available_handler(request: Request, exc: LessonNotAvailableError):
-    return JSONResponse(
-        status_code=400,
+# Error type -> (HTTP status, client-facing state). Starlette resolves handlers
+# along the exception's MRO, so the one LearnoError handler covers them all.
+_ERROR_RESPONSES = {
+    SessionNotFoundError: (404, "SESSION_NOT_FOUND"),
+    SessionExpiredError: (410, "SESSION_EXPIRED"),
+    InvalidInputError: (400, "INVALID_INPUT"),
+    LessonNotAvailableError: (400, "LESSON_NOT_AVAILABLE"),
+    AIServiceError: (503, "AI_SERVICE_ERROR"),
+}
+
+
+@app.exception_handler(LearnoError)
+async def learno_error_handler(request: Request, exc: LearnoError):
+    status_code, state = _ERROR_RESPONSES.get(type(exc), (500, "INTERNAL_ERROR"))
+    return ORJSONResponse(
+        status_code=status_code,
         content={
             "status": "error",
             "message": str(exc),
-            "state": "LESSON_NOT_AVAILABLE"
-        }
-    )
-
-
-@app.exception_handler(AIServiceError)
-async def ai_service_error_handler(request: Request, exc: AIServiceError):
-    return JSONResponse(
-        status_code=503,
-        content={
-            "status": "error",
-            "message": str(exc),
-            "state": "AI_SERVICE_ERROR"
+            "state": state
         }
     )
 
@@ -197,24 +202,28 @@ async def ai_service_error_handler(request: Request, exc: AIServiceError):
 # Root Endpoints
 # =============================================================================
 
+# Constant payloads are serialized once at import — these handlers just return bytes.
+_ROOT_BYTES = orjson.dumps({
+    "status": "success",
+    "message": "Welcome to Learno Educational Backend v2.0",
+    "data": {
+        "version": "2.0.0",
+        "api_docs": "/docs",
+        "health": "healthy",
+        "features": [
+            "Comprehensive chapter teaching",
+            "Concept-based learning",
+            "Visual explanations with AI images",
+            "Adaptive difficulty",
+            "Full chapter coverage"
+        ]
+    }
+})
+
+
 @app.get("/")
 async def root():
-    return {
-        "status": "success",
-        "message": "Welcome to Learno Educational Backend v2.0",
-        "data": {
-            "version": "2.0.0",
-            "api_docs": "/docs",
-            "health": "healthy",
-            "features": [
-                "Comprehensive chapter teaching",
-                "Concept-based learning",
-                "Visual explanations with AI images",
-                "Adaptive difficulty",
-                "Full chapter coverage"
-            ]
-        }
-    }
+    return Response(content=_ROOT_BYTES, media_type="application/json")
 
 
 @app.get("/health")
@@ -251,42 +260,45 @@ async def api_health_check():
 # Teaching Flow Documentation
 # =============================================================================
 
+_TEACHING_FLOW_BYTES = orjson.dumps({
+    "status": "success",
+    "message": "Teaching Flow Documentation",
+    "data": {
+        "overview": "Learno teaches complete chapters with multiple concepts",
+        "flow": {
+            "1_start": "POST /api/v1/session/start - Begin lesson, get welcome",
+            "2_continue": "POST /api/v1/lesson/continue - Progress through teaching phases",
+            "3_respond": "POST /api/v1/lesson/respond - Answer questions",
+            "4_silence": "POST /api/v1/lesson/silence - Handle silence",
+            "5_end": "POST /api/v1/session/end - End lesson"
+        },
+        "teaching_phases_per_concept": [
+            "INTRODUCTION - What we'll learn",
+            "EXPLANATION - Teach the concept",
+            "VISUAL_EXAMPLE - Show with image",
+            "GUIDED_PRACTICE - Practice together",
+            "INDEPENDENT_PRACTICE - Child tries alone",
+            "MASTERY_CHECK - Verify understanding"
+        ],
+        "chapter_structure": [
+            "WELCOME - Greet and overview",
+            "TEACHING - All concepts (each with 6 phases)",
+            "CHAPTER_REVIEW - Review questions",
+            "CELEBRATION - Complete!"
+        ],
+        "notes": [
+            "Call /continue after non-question responses",
+            "Call /respond after questions",
+            "Lesson doesn't end until all concepts mastered",
+            "Images generated for visual teaching"
+        ]
+    }
+})
+
+
 @app.get("/teaching-flow")
 async def teaching_flow_info():
     """
     Documentation endpoint explaining the teaching flow.
     """
-    return {
-        "status": "success",
-        "message": "Teaching Flow Documentation",
-        "data": {
-            "overview": "Learno teaches complete chapters with multiple concepts",
-            "flow": {
-                "1_start": "POST /api/v1/session/start - Begin lesson, get welcome",
-                "2_continue": "POST /api/v1/lesson/continue - Progress through teaching phases",
-                "3_respond": "POST /api/v1/lesson/respond - Answer questions",
-                "4_silence": "POST /api/v1/lesson/silence - Handle silence",
-                "5_end": "POST /api/v1/session/end - End lesson"
-            },
-            "teaching_phases_per_concept": [
-                "INTRODUCTION - What we'll learn",
-                "EXPLANATION - Teach the concept",
-                "VISUAL_EXAMPLE - Show with image",
-                "GUIDED_PRACTICE - Practice together",
-                "INDEPENDENT_PRACTICE - Child tries alone",
-                "MASTERY_CHECK - Verify understanding"
-            ],
-            "chapter_structure": [
-                "WELCOME - Greet and overview",
-                "TEACHING - All concepts (each with 6 phases)",
-                "CHAPTER_REVIEW - Review questions",
-                "CELEBRATION - Complete!"
-            ],
-            "notes": [
-                "Call /continue after non-question responses",
-                "Call /respond after questions",
-                "Lesson doesn't end until all concepts mastered",
-                "Images generated for visual teaching"
-            ]
-        }
-    }
+    return Response(content=_TEACHING_FLOW_BYTES, media_type="application/json")
@@ -27,8 +27,9 @@ Chapter
 =============================================================================
 """
 
+import sys
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional
+from typing import Dict, Optional, Tuple
 from enum import Enum
 
 
@@ -52,18 +53,41 @@ class LessonPhase(Enum):
     COMPLETED = "completed"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
+class Example:
+    """A worked example the teacher demonstrates"""
+    problem: str
+    solution: str
+    explanation: str
+
+
+@dataclass(slots=True, frozen=True)
 class PracticeQuestion:
     """A single practice question within a concept"""
     question_text: str
     expected_answer: str
-    acceptable_answers: List[str]
+    acceptable_answers: Tuple[str, ...]
     hint_text: str
     difficulty: int = 1  # 1=easy, 2=medium, 3=hard
     image_prompt: Optional[str] = None  # For generating visual
-
-
-@dataclass
+    acceptable_set: frozenset = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Answers are matched against the child's normalized transcript on
+        # every turn — store them stripped, lowercased and interned so answer
+        # checks only have to normalize the child's side.
+        object.__setattr__(self, "expected_answer", sys.intern(self.expected_answer.strip().lower()))
+        object.__setattr__(
+            self, "acceptable_answers",
+            tuple(sys.intern(a.strip().lower()) for a in self.acceptable_answers)
+        )
+        object.__setattr__(self, "acceptable_set", frozenset(self.acceptable_answers))
+        # Image prompts double as image-cache keys — one stripped, shared copy each
+        if self.image_prompt:
+            object.__setattr__(self, "image_prompt", sys.intern(self.image_prompt.strip()))
+
+
+@dataclass(slots=True, frozen=True)
 class ConceptContent:
     """
     A single concept within a chapter.
@@ -77,31 +101,46 @@ class ConceptContent:
     learning_objective: str  # What child will learn
     introduction_script: str  # How to introduce
     explanation_script: str  # Detailed explanation
-    key_points: List[str]  # Main takeaways
+    key_points: Tuple[str, ...]  # Main takeaways
     
     # Visual teaching
     visual_description: str  # Image to generate
     visual_explanation: str  # How to explain the image
     
     # Examples (teacher demonstrates)
-    examples: List[Dict[str, str]]  # [{"problem": "...", "solution": "...", "explanation": "..."}]
+    examples: Tuple[Example, ...]
     
     # Practice questions (child practices)
-    guided_questions: List[PracticeQuestion]  # Teacher helps
-    independent_questions: List[PracticeQuestion]  # Child alone
+    guided_questions: Tuple[PracticeQuestion, ...]  # Teacher helps
+    independent_questions: Tuple[PracticeQuestion, ...]  # Child alone
     
     # Verification
     mastery_check_question: str  # Final check before moving on
     mastery_answer: str
-    mastery_acceptable: List[str]
+    mastery_acceptable: Tuple[str, ...]
     
     # Teaching tips
-    common_mistakes: List[str]
-    encouragement_phrases: List[str]
-    struggle_hints: List[str]
-
-
-@dataclass
+    common_mistakes: Tuple[str, ...]
+    encouragement_phrases: Tuple[str, ...]
+    struggle_hints: Tuple[str, ...]
+    mastery_acceptable_set: frozenset = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "visual_description", sys.intern(self.visual_description.strip()))
+        object.__setattr__(self, "mastery_answer", sys.intern(self.mastery_answer.strip().lower()))
+        object.__setattr__(
+            self, "mastery_acceptable",
+            tuple(sys.intern(a.strip().lower()) for a in self.mastery_acceptable)
+        )
+        for name in ("key_points", "examples", "guided_questions", "independent_questions"):
+            object.__setattr__(self, name, tuple(getattr(self, name)))
+        object.__setattr__(self, "mastery_acceptable_set", frozenset(self.mastery_acceptable))
+        # Tips repeat across concepts and chapters — share one copy of each phrase
+        for name in ("common_mistakes", "encouragement_phrases", "struggle_hints"):
+            object.__setattr__(self, name, tuple(sys.intern(p) for p in getattr(self, name)))
+
+
+@dataclass(slots=True, frozen=True)
 class ChapterContent:
     """
     A complete chapter/lesson with all concepts.
@@ -117,37 +156,44 @@ class ChapterContent:
     chapter_overview: str  # What we'll learn today
     
     # Concepts (in order)
-    concepts: List[ConceptContent]
+    concepts: Tuple[ConceptContent, ...]
     
     # Chapter review
-    review_questions: List[PracticeQuestion]
+    review_questions: Tuple[PracticeQuestion, ...]
     
     # Completion
     completion_script: str
     certificate_text: str
+
+    # Lookup indexes over `concepts`, filled once in __post_init__ (the dicts
+    # themselves are mutable, so this works on the frozen instance)
+    _by_id: Dict[str, ConceptContent] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _by_order: Dict[int, ConceptContent] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "concepts", tuple(self.concepts))
+        object.__setattr__(self, "review_questions", tuple(self.review_questions))
+        for concept in self.concepts:
+            # setdefault keeps first-match semantics for duplicate ids/orders
+            self._by_id.setdefault(concept.concept_id, concept)
+            self._by_order.setdefault(concept.order, concept)
     
     @property
     def total_concepts(self) -> int:
         return len(self.concepts)
     
     def get_concept(self, concept_id: str) -> Optional[ConceptContent]:
-        for concept in self.concepts:
-            if concept.concept_id == concept_id:
-                return concept
-        return None
+        return self._by_id.get(concept_id)
     
     def get_concept_by_order(self, order: int) -> Optional[ConceptContent]:
-        for concept in self.concepts:
-            if concept.order == order:
-                return concept
-        return None
+        return self._by_order.get(order)
 
 
 # =============================================================================
 # COUNTING CHAPTER - COMPREHENSIVE CONTENT
 # =============================================================================
 
-def get_counting_chapter() -> ChapterContent:
+def _build_counting_chapter() -> ChapterContent:
     """
     Complete counting chapter for Grade 2.
     
@@ -173,8 +219,7 @@ def get_counting_chapter() -> ChapterContent:
         # =====================================================================
         # WELCOME
         # =====================================================================
-        welcome_script="""
-Hello, little friend! 😊🎧 I'm Learno, your learning buddy!
+        welcome_script="""Hello, little friend! 😊🎧 I'm Learno, your learning buddy!
 
 Today we're going on a NUMBER ADVENTURE! ✨🔢
 
@@ -186,11 +231,9 @@ We're going to learn SO many cool things:
 
 Are you excited? I am! 🎉
 
-Let's start our adventure! 🚀
-        """.strip(),
+Let's start our adventure! 🚀""",
         
-        chapter_overview="""
-Here's what we'll learn today:
+        chapter_overview="""Here's what we'll learn today:
 
 1️⃣ First, we'll meet the numbers 1, 2, 3, 4, and 5
 2️⃣ Then, we'll learn 6, 7, 8, 9, and 10
@@ -198,8 +241,7 @@ Here's what we'll learn today:
 4️⃣ We'll learn which group has MORE
 5️⃣ Finally, we'll learn to ADD numbers!
 
-Ready? Let's go! 🌟
-        """.strip(),
+Ready? Let's go! 🌟""",
         
         # =====================================================================
         # CONCEPTS
@@ -215,18 +257,15 @@ Ready? Let's go! 🌟
                 
                 learning_objective="Recognize and name numbers 1, 2, 3, 4, and 5",
                 
-                introduction_script="""
-Let's meet our first number friends! 😊🔢
+                introduction_script="""Let's meet our first number friends! 😊🔢
 
 Numbers are everywhere! They help us count things.
 
 Today, we'll meet five special numbers: 1, 2, 3, 4, and 5! ✨
 
-Each number has its own shape. Let's learn them! 🌟
-                """.strip(),
+Each number has its own shape. Let's learn them! 🌟""",
                 
-                explanation_script="""
-Let me show you each number:
+                explanation_script="""Let me show you each number:
 
 1️⃣ This is ONE - it looks like a stick! Just one line going down.
    ONE means just a single thing. Like one nose on your face! 👃
@@ -243,8 +282,7 @@ Let me show you each number:
 5️⃣ This is FIVE - it has a hat on top and a round belly!
    FIVE is like one whole hand! ✋
 
-Let's see them together! 🌟
-                """.strip(),
+Let's see them together! 🌟""",
                 
                 key_points=[
                     "1 is just one line - like a stick",
@@ -256,8 +294,7 @@ Let's see them together! 🌟
                 
                 visual_description="Numbers 1, 2, 3, 4, 5 displayed large and colorful in a row, each with cute cartoon objects below showing the quantity (1 apple, 2 stars, 3 hearts, 4 balls, 5 flowers), child-friendly cartoon style, white background",
                 
-                visual_explanation="""
-Look at this picture! 🖼️😊
+                visual_explanation="""Look at this picture! 🖼️😊
 
 1️⃣ See the number 1? It has ONE apple below it! 🍎
 2️⃣ The number 2 has TWO stars! ⭐⭐
@@ -265,25 +302,24 @@ Look at this picture! 🖼️😊
 4️⃣ Number 4 has FOUR balls! 🔵🔵🔵🔵
 5️⃣ And number 5 has FIVE flowers! 🌸🌸🌸🌸🌸
 
-See how the number tells us how many things there are? 🌟
-                """.strip(),
+See how the number tells us how many things there are? 🌟""",
                 
                 examples=[
-                    {
-                        "problem": "What number is this: 3",
-                        "solution": "THREE",
-                        "explanation": "This is three! See the two bumps? It looks like a sideways heart! 💕"
-                    },
-                    {
-                        "problem": "What number is this: 1",
-                        "solution": "ONE",
-                        "explanation": "This is one! Just a simple line going down. Easy peasy! ✨"
-                    },
-                    {
-                        "problem": "What number is this: 5",
-                        "solution": "FIVE",
-                        "explanation": "This is five! It has a flat hat on top and a round tummy! 😊"
-                    }
+                    Example(
+                        problem="What number is this: 3",
+                        solution="THREE",
+                        explanation="This is three! See the two bumps? It looks like a sideways heart! 💕"
+                    ),
+                    Example(
+                        problem="What number is this: 1",
+                        solution="ONE",
+                        explanation="This is one! Just a simple line going down. Easy peasy! ✨"
+                    ),
+                    Example(
+                        problem="What number is this: 5",
+                        solution="FIVE",
+                        explanation="This is five! It has a flat hat on top and a round tummy! 😊"
+                    )
                 ],
                 
                 guided_questions=[
@@ -364,18 +400,15 @@ See how the number tells us how many things there are? 🌟
                 
                 learning_objective="Recognize and name numbers 6, 7, 8, 9, and 10",
                 
-                introduction_script="""
-Wow! You learned 1, 2, 3, 4, and 5! 🎉
+                introduction_script="""Wow! You learned 1, 2, 3, 4, and 5! 🎉
 
 Now let's meet FIVE MORE number friends! 
 
 These are the bigger numbers: 6, 7, 8, 9, and 10! 🔢✨
 
-After 10, we can count even higher! But let's master these first! 🌟
-                """.strip(),
+After 10, we can count even higher! But let's master these first! 🌟""",
                 
-                explanation_script="""
-Let me introduce our new number friends:
+                explanation_script="""Let me introduce our new number friends:
 
 6️⃣ This is SIX - it looks like a curly snail! 🐌
    SIX is five plus one more!
@@ -392,8 +425,7 @@ Let me introduce our new number friends:
 🔟 This is TEN - it's special because it uses TWO digits!
     A 1 and a 0 together! This is where two-digit numbers start! 🎉
 
-These numbers come after 5. So we count: 1, 2, 3, 4, 5, 6, 7, 8, 9, 10! 🌟
-                """.strip(),
+These numbers come after 5. So we count: 1, 2, 3, 4, 5, 6, 7, 8, 9, 10! 🌟""",
                 
                 key_points=[
                     "6 is curly like a snail",
@@ -405,8 +437,7 @@ These numbers come after 5. So we count: 1, 2, 3, 4, 5, 6, 7, 8, 9, 10! 🌟
                 
                 visual_description="Numbers 6, 7, 8, 9, 10 displayed large and colorful, each with objects below (6 oranges, 7 stars, 8 balloons, 9 flowers, 10 dots arranged in two rows of 5), cartoon style",
                 
-                visual_explanation="""
-Look at our new number friends! 🖼️😊
+                visual_explanation="""Look at our new number friends! 🖼️😊
 
 6️⃣ Number 6 has SIX yummy oranges! 🍊🍊🍊🍊🍊🍊
 7️⃣ Number 7 has SEVEN twinkly stars! ⭐
@@ -414,20 +445,19 @@ Look at our new number friends! 🖼️😊
 9️⃣ Number 9 has NINE pretty flowers! 🌸
 🔟 Number 10 has TEN dots - see? Five on top, five on bottom! 
 
-10 is a big number! It takes two digits to write it! 🌟
-                """.strip(),
+10 is a big number! It takes two digits to write it! 🌟""",
                 
                 examples=[
-                    {
-                        "problem": "What number is this: 8",
-                        "solution": "EIGHT",
-                        "explanation": "This is eight! See how it looks like a snowman? Two circles! ⛄"
-                    },
-                    {
-                        "problem": "What number is this: 10",
-                        "solution": "TEN",
-                        "explanation": "This is ten! It's special - a 1 and a 0 together! Two digits! 🎉"
-                    }
+                    Example(
+                        problem="What number is this: 8",
+                        solution="EIGHT",
+                        explanation="This is eight! See how it looks like a snowman? Two circles! ⛄"
+                    ),
+                    Example(
+                        problem="What number is this: 10",
+                        solution="TEN",
+                        explanation="This is ten! It's special - a 1 and a 0 together! Two digits! 🎉"
+                    )
                 ],
                 
                 guided_questions=[
@@ -508,8 +538,7 @@ Look at our new number friends! 🖼️😊
                 
                 learning_objective="Count objects accurately from 1 to 10",
                 
-                introduction_script="""
-Now that you know the numbers, let's USE them! 🎉
+                introduction_script="""Now that you know the numbers, let's USE them! 🎉
 
 Counting means finding out HOW MANY things there are! 🔢
 
@@ -518,11 +547,9 @@ We count things every day:
 ⭐ How many stars?
 👆 How many fingers?
 
-Let me teach you the MAGIC of counting! ✨
-                """.strip(),
+Let me teach you the MAGIC of counting! ✨""",
                 
-                explanation_script="""
-Here's the SECRET to counting correctly! 🤫✨
+                explanation_script="""Here's the SECRET to counting correctly! 🤫✨
 
 The Counting Rules:
 1️⃣ Point to EACH thing ONE time
@@ -540,8 +567,7 @@ I point and count:
 
 The last number was THREE! So there are 3 apples! 🎉
 
-Important! Don't skip any, and don't count the same one twice! 😊
-                """.strip(),
+Important! Don't skip any, and don't count the same one twice! 😊""",
                 
                 key_points=[
                     "Touch or point to each object",
@@ -553,8 +579,7 @@ Important! Don't skip any, and don't count the same one twice! 😊
                 
                 visual_description="A row of 5 red apples with a cartoon hand pointing to each one, numbers 1-2-3-4-5 appearing above each apple as if counting, cartoon style, child-friendly",
                 
-                visual_explanation="""
-Watch how I count! 🖼️👆
+                visual_explanation="""Watch how I count! 🖼️👆
 
 See the hand pointing to each apple?
 
@@ -566,20 +591,19 @@ See the hand pointing to each apple?
 
 The last number was FIVE! So there are 5 apples! 🍎🍎🍎🍎🍎
 
-Now you try! 🌟
-                """.strip(),
+Now you try! 🌟""",
                 
                 examples=[
-                    {
-                        "problem": "Count: ⭐⭐⭐",
-                        "solution": "3",
-                        "explanation": "One star, two stars, three stars! There are 3 stars! ⭐"
-                    },
-                    {
-                        "problem": "Count: 🎈🎈🎈🎈",
-                        "solution": "4",
-                        "explanation": "One, two, three, four! There are 4 balloons! 🎈"
-                    }
+                    Example(
+                        problem="Count: ⭐⭐⭐",
+                        solution="3",
+                        explanation="One star, two stars, three stars! There are 3 stars! ⭐"
+                    ),
+                    Example(
+                        problem="Count: 🎈🎈🎈🎈",
+                        solution="4",
+                        explanation="One, two, three, four! There are 4 balloons! 🎈"
+                    )
                 ],
                 
                 guided_questions=[
@@ -661,8 +685,7 @@ Now you try! 🌟
                 
                 learning_objective="Compare two groups and identify which has more or less",
                 
-                introduction_script="""
-You're so good at counting now! 🎉
+                introduction_script="""You're so good at counting now! 🎉
 
 Now let's learn something fun: COMPARING! 🔍
 
@@ -670,11 +693,9 @@ Comparing means looking at two groups and asking:
 ❓ Which has MORE?
 ❓ Which has LESS?
 
-This helps us know which group is BIGGER! 🌟
-                """.strip(),
+This helps us know which group is BIGGER! 🌟""",
                 
-                explanation_script="""
-Here's how to compare two groups! 🔢
+                explanation_script="""Here's how to compare two groups! 🔢
 
 Step 1: Count the FIRST group
 Step 2: Count the SECOND group  
@@ -692,8 +713,7 @@ Example:
 So bananas has MORE! ✅
 And apples has LESS! ✅
 
-Easy rule: More things = bigger number! 🌟
-                """.strip(),
+Easy rule: More things = bigger number! 🌟""",
                 
                 key_points=[
                     "Count both groups first",
@@ -705,8 +725,7 @@ Easy rule: More things = bigger number! 🌟
                 
                 visual_description="Split image: Left side shows 3 red apples with number 3, Right side shows 5 yellow bananas with number 5, an arrow pointing to bananas with text 'MORE!', cartoon style, child-friendly",
                 
-                visual_explanation="""
-Look at this picture! 🖼️😊
+                visual_explanation="""Look at this picture! 🖼️😊
 
 On the LEFT: 3 apples 🍎🍎🍎
 On the RIGHT: 5 bananas 🍌🍌🍌🍌🍌
@@ -717,15 +736,14 @@ Which number is bigger: 3 or 5? 🤔
 
 That means APPLES has LESS! 
 
-See? We compare by counting first! 🌟
-                """.strip(),
+See? We compare by counting first! 🌟""",
                 
                 examples=[
-                    {
-                        "problem": "⭐⭐ vs ⭐⭐⭐⭐ - Which has more?",
-                        "solution": "The second group (4 stars)",
-                        "explanation": "2 stars vs 4 stars. 4 is bigger than 2, so the second group has MORE! ✨"
-                    }
+                    Example(
+                        problem="⭐⭐ vs ⭐⭐⭐⭐ - Which has more?",
+                        solution="The second group (4 stars)",
+                        explanation="2 stars vs 4 stars. 4 is bigger than 2, so the second group has MORE! ✨"
+                    )
                 ],
                 
                 guided_questions=[
@@ -799,8 +817,7 @@ See? We compare by counting first! 🌟
                 
                 learning_objective="Understand addition as putting groups together",
                 
-                introduction_script="""
-You're doing AMAZING! 🎉🌟
+                introduction_script="""You're doing AMAZING! 🎉🌟
 
 Now for something really cool: ADDITION! ➕
 
@@ -808,11 +825,9 @@ Addition means putting things TOGETHER to find out how many TOTAL!
 
 When you ADD, you get MORE than you started with! 
 
-Let me show you the magic! ✨🔢
-                """.strip(),
+Let me show you the magic! ✨🔢""",
                 
-                explanation_script="""
-Addition is like making groups into ONE BIG group! 🎉
+                explanation_script="""Addition is like making groups into ONE BIG group! 🎉
 
 Here's how it works:
 
@@ -829,8 +844,7 @@ So: 2 + 1 = 3! ✨
 The + sign means "put together" or "add"!
 The = sign means "equals" or "is the same as"!
 
-Addition always makes a BIGGER number! 📈
-                """.strip(),
+Addition always makes a BIGGER number! 📈""",
                 
                 key_points=[
                     "Addition means putting together",
@@ -842,8 +856,7 @@ Addition always makes a BIGGER number! 📈
                 
                 visual_description="Visual addition: 2 red apples on left, plus sign, 1 red apple in middle, equals sign, 3 red apples on right. Below shows '2 + 1 = 3' in large colorful numbers, cartoon style",
                 
-                visual_explanation="""
-Look at this picture! 🖼️➕
+                visual_explanation="""Look at this picture! 🖼️➕
 
 On the left: 2 apples 🍎🍎
 In the middle: + (plus sign - this means ADD!)
@@ -854,20 +867,19 @@ On the right: 3 apples 🍎🍎🍎
 We PUT TOGETHER 2 apples and 1 apple!
 Now we have 3 apples TOTAL!
 
-2 + 1 = 3! 🎉
-                """.strip(),
+2 + 1 = 3! 🎉""",
                 
                 examples=[
-                    {
-                        "problem": "1 + 1 = ?",
-                        "solution": "2",
-                        "explanation": "One apple plus one more apple! Count together: 1, 2! So 1 + 1 = 2! ✨"
-                    },
-                    {
-                        "problem": "2 + 2 = ?",
-                        "solution": "4",
-                        "explanation": "Two fingers plus two more fingers! Count: 1, 2, 3, 4! So 2 + 2 = 4! 🎉"
-                    }
+                    Example(
+                        problem="1 + 1 = ?",
+                        solution="2",
+                        explanation="One apple plus one more apple! Count together: 1, 2! So 1 + 1 = 2! ✨"
+                    ),
+                    Example(
+                        problem="2 + 2 = ?",
+                        solution="4",
+                        explanation="Two fingers plus two more fingers! Count: 1, 2, 3, 4! So 2 + 2 = 4! 🎉"
+                    )
                 ],
                 
                 guided_questions=[
@@ -985,8 +997,7 @@ Now we have 3 apples TOTAL!
         # =====================================================================
         # COMPLETION
         # =====================================================================
-        completion_script="""
-🎉🎊🥳 WOW WOW WOW! 🥳🎊🎉
+        completion_script="""🎉🎊🥳 WOW WOW WOW! 🥳🎊🎉
 
 YOU DID IT! You finished the WHOLE chapter!
 
@@ -1005,13 +1016,21 @@ You worked so hard and learned SO much!
 
 See you next time for more learning adventures! 
 
-Bye bye, my little math genius! 👋😊❤️
-        """.strip(),
+Bye bye, my little math genius! 👋😊❤️""",
         
         certificate_text="🏆 CERTIFICATE OF ACHIEVEMENT 🏆\nCompleted: Counting Fun Adventure\nYou are a Math Superstar! ⭐"
     )
 
 
+# Built once at import — the content is static, so every caller shares this
+# instance and must treat it as read-only.
+COUNTING_CHAPTER: ChapterContent = _build_counting_chapter()
+
+
+def get_counting_chapter() -> ChapterContent:
+    return COUNTING_CHAPTER
+
+
 # =============================================================================
 # CHAPTER REGISTRY
 # =============================================================================
@@ -1020,37 +1039,38 @@ AVAILABLE_CHAPTERS = {
     "counting": get_counting_chapter,
 }
 
+# Map various names to counting chapter for now
+_COUNTING_ALIASES = frozenset({
+    "counting", "counting fun", "counting fun adventure",
+    "numbers", "count", "math basics",
+})
+
+# Every accepted (lowercase) name → factory, so lookup is a single probe
+_CHAPTER_REGISTRY = {
+    **AVAILABLE_CHAPTERS,
+    **{alias: get_counting_chapter for alias in _COUNTING_ALIASES},
+}
+
+# For prototype, Grade 2 Math maps to counting chapter
+_VALID_TOPICS = frozenset({
+    "counting", "comparing and ordering", "skip counting and number patterns",
+    "names of numbers", "even and odd", "mixed operations: one digit",
+    "mixed operations one digit",
+})
+
 
 def get_chapter(chapter_id: str) -> Optional[ChapterContent]:
     """Get chapter content by ID."""
-    chapter_id_lower = chapter_id.lower().strip()
-    
-    # Map various names to counting chapter for now
-    counting_aliases = [
-        "counting", "counting fun", "counting fun adventure",
-        "numbers", "count", "math basics"
-    ]
-    
-    if chapter_id_lower in counting_aliases:
-        return get_counting_chapter()
-    
-    factory = AVAILABLE_CHAPTERS.get(chapter_id_lower)
-    if factory:
-        return factory()
-    
-    return None
+    # Already-normalized IDs (the common case) skip the strip/lower copies
+    factory = _CHAPTER_REGISTRY.get(chapter_id) or _CHAPTER_REGISTRY.get(chapter_id.strip().lower())
+    return factory() if factory else None
 
 
 def is_chapter_available(grade: int, subject: str, lesson: str) -> bool:
     """Check if chapter is available."""
-    subject_lower = subject.lower().strip()
-    lesson_lower = lesson.lower().strip()
-    
-    # For prototype, Grade 2 Math maps to counting chapter
-    valid_topics = [
-        "counting", "comparing and ordering", "skip counting and number patterns",
-        "names of numbers", "even and odd", "mixed operations: one digit",
-        "mixed operations one digit"
-    ]
-    
-    return grade == 2 and subject_lower == "math" and lesson_lower in valid_topics
+    # Cheapest, most selective check first
+    if grade != 2:
+        return False
+    if subject.strip().lower() != "math":
+        return False
+    return lesson.strip().lower() in _VALID_TOPICS
@@ -8,9 +8,10 @@ Routes for Dynamic Lesson System - FIXED VERSION
 =============================================================================
 """
 
+import json
 import logging
-import re
 from fastapi import APIRouter, Query, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, field_validator
 from typing import List, Optional
 
@@ -20,10 +21,14 @@ from app.models.curriculum import (
     GRADE_DISPLAY_NAMES, get_grade_display_name,
 )
 from app.rate_limiter import limiter
-from app.utils.exceptions import InvalidInputError
+from app.utils.exceptions import AIServiceError, InvalidInputError
 
 logger = logging.getLogger(__name__)
 
+# Characters deleted from identifiers/names, and from free-text transcripts
+_SANITIZE_TABLE = str.maketrans('', '', '<>"\'/\\')
+_TRANSCRIPT_TABLE = str.maketrans('', '', '<>')
+
 
 # =============================================================================
 # REQUEST MODELS (FIXED)
@@ -46,14 +51,14 @@ class StartSessionRequest(BaseModel):
     def validate_student_id(cls, v):
         if not v or not str(v).strip():
             return "default"
-        return re.sub(r'[<>"\'/\\]', '', str(v).strip())[:100]
+        return str(v).strip().translate(_SANITIZE_TABLE)[:100]
 
     @field_validator('student_name', 'child_name', mode='before')
     @classmethod
     def validate_name(cls, v):
         if not v or not str(v).strip():
             return "friend"
-        return re.sub(r'[<>"\'/\\]', '', str(v).strip())[:50]
+        return str(v).strip().translate(_SANITIZE_TABLE)[:50]
 
     @field_validator('app_language', mode='before')
     @classmethod
@@ -66,7 +71,7 @@ class StartSessionRequest(BaseModel):
     def validate_strings(cls, v):
         if not v or not str(v).strip():
             raise ValueError("Field cannot be empty")
-        return re.sub(r'[<>"\'/\\]', '', str(v).strip())[:100]
+        return str(v).strip().translate(_SANITIZE_TABLE)[:100]
 
 
 class ContinueRequest(BaseModel):
@@ -91,7 +96,7 @@ class ChildResponseRequest(BaseModel):
     def validate_transcript(cls, v):
         if not v or not str(v).strip():
             raise ValueError("transcript is required")
-        cleaned = re.sub(r'[<>]', '', str(v).strip())
+        cleaned = str(v).strip().translate(_TRANSCRIPT_TABLE)
         return cleaned[:500]
 
 
@@ -187,22 +192,63 @@ class EndSessionResponse(BaseModel):
     data: EndSessionResponseData
 
 
+def _learno_response_data(response) -> LearnoResponseData:
+    """
+    Serialize a service LearnoResponse (text, chunks, image) for the API.
+    The service already produced well-typed values, so validation is skipped.
+    """
+    return LearnoResponseData.model_construct(
+        text=response.text,
+        messages=[
+            MessageChunkData.model_construct(text=c.text, delay_ms=c.delay_ms)
+            for c in response.messages
+        ],
+        response_type=response.response_type,
+        generated_image_url=response.image_url,
+        image_position=response.image_position,
+        lesson_language=response.lesson_language,
+    )
+
+
+def _json(body: BaseModel) -> ORJSONResponse:
+    """
+    Return a response envelope directly. The handlers build it from our own
+    service objects, so FastAPI's response_model re-validation and
+    jsonable_encoder pass are skipped; response_model stays for the OpenAPI docs.
+    """
+    return ORJSONResponse(body.model_dump())
+
+
+def _lesson_response(response, message: str) -> ORJSONResponse:
+    """DynamicLessonResponse for a conversational turn (/respond, /silence)."""
+    return _json(DynamicLessonResponse(
+        status="success",
+        message=message,
+        data=LessonResponseData(
+            learno_response=_learno_response_data(response),
+            progress=None,
+            is_complete=response.is_lesson_complete,
+        )
+    ))
+
+
 # =============================================================================
 # SESSION ROUTER
 # =============================================================================
+# Handlers that call the (blocking) lesson service are plain `def` so FastAPI
+# runs them in its threadpool instead of stalling the event loop on OpenAI.
 
 session_router = APIRouter(prefix="/session", tags=["Session Management"])
 
 
 @session_router.post("/start", response_model=StartSessionResponse)
 @limiter.limit("30/minute")
-async def start_session(request: Request, body: StartSessionRequest):
+def start_session(request: Request, body: StartSessionRequest):
     """Start a new conversational lesson."""
     child_name = body.child_name or body.student_name or "friend"
     logger.info(
-        f"Starting conversational lesson: child={child_name}, "
-        f"grade={body.grade}, subject={body.subject}, lesson={body.lesson}, "
-        f"app_language={body.app_language}"
+        "Starting conversational lesson: child=%s, grade=%s, subject=%s, lesson=%s, app_language=%s",
+        child_name, body.grade, body.subject, body.lesson, body.app_language,
     )
 
     service = get_conversational_lesson_service()
@@ -216,37 +262,27 @@ async def start_session(request: Request, body: StartSessionRequest):
         child_id=body.child_id,
     )
 
-    return StartSessionResponse(
+    return _json(StartSessionResponse(
         status="success",
         message="Lesson started successfully",
         data=StartSessionResponseData(
             session_id=session.session_id,
-            learno_response=LearnoResponseData(
-                text=response.text,
-                messages=[
-                    MessageChunkData(text=c.text, delay_ms=c.delay_ms)
-                    for c in response.messages
-                ],
-                response_type=response.response_type,
-                generated_image_url=response.image_url,
-                image_position=response.image_position,
-                lesson_language=response.lesson_language,
-            ),
+            learno_response=_learno_response_data(response),
             progress=None,
         )
-    )
+    ))
 
 
 @session_router.post("/end", response_model=EndSessionResponse)
 @limiter.limit("60/minute")
-async def end_session(request: Request, body: EndSessionRequest):
+def end_session(request: Request, body: EndSessionRequest):
     """End the lesson session."""
-    logger.info(f"Ending session: {body.session_id}")
+    logger.info("Ending session: %s", body.session_id)
 
     service = get_conversational_lesson_service()
     summary, message = service.end_lesson(body.session_id)
     
-    return EndSessionResponse(
+    return _json(EndSessionResponse(
         status="success",
         message=message,
         data=EndSessionResponseData(
@@ -255,7 +291,7 @@ async def end_session(request: Request, body: EndSessionRequest):
             total_wrong=summary.get("total_wrong", 0),
             is_complete=summary.get("is_complete", False)
         )
-    )
+    ))
 
 
 # =============================================================================
@@ -269,12 +305,12 @@ lesson_router = APIRouter(prefix="/lesson", tags=["Lesson Interaction"])
 @limiter.limit("60/minute")
 async def continue_teaching(request: Request, body: ContinueRequest):
     """Kept for API compatibility — in conversational mode, /respond is used instead."""
-    logger.info(f"Continue (noop in conversational mode): {body.session_id}")
+    logger.info("Continue (noop in conversational mode): %s", body.session_id)
 
     service = get_conversational_lesson_service()
     response = service.continue_teaching(body.session_id)
 
-    return DynamicLessonResponse(
+    return _json(DynamicLessonResponse(
         status="success",
         message="Conversational mode — use /respond",
         data=LessonResponseData(
@@ -287,14 +323,14 @@ async def continue_teaching(request: Request, body: ContinueRequest):
             progress=None,
             is_complete=False,
         )
-    )
+    ))
 
 
 @lesson_router.post("/respond", response_model=DynamicLessonResponse)
 @limiter.limit("60/minute")
-async def respond_to_question(request: Request, body: ChildResponseRequest):
+def respond_to_question(request: Request, body: ChildResponseRequest):
     """Process child's response — full conversation history sent to AI."""
-    logger.info(f"Processing response: session={body.session_id}")
+    logger.info("Processing response: session=%s", body.session_id)
 
     service = get_conversational_lesson_service()
     response = service.process_response(
@@ -302,32 +338,56 @@ async def respond_to_question(request: Request, body: ChildResponseRequest):
         transcript=body.transcript,
     )
 
-    return DynamicLessonResponse(
-        status="success",
-        message="Response processed",
-        data=LessonResponseData(
-            learno_response=LearnoResponseData(
-                text=response.text,
-                messages=[
-                    MessageChunkData(text=c.text, delay_ms=c.delay_ms)
-                    for c in response.messages
-                ],
-                response_type=response.response_type,
-                generated_image_url=response.image_url,
-                image_position=response.image_position,
-                lesson_language=response.lesson_language,
-            ),
-            progress=None,
-            is_complete=response.is_lesson_complete,
-        )
+    return _lesson_response(response, "Response processed")
+
+
+@lesson_router.post("/respond/stream")
+@limiter.limit("60/minute")
+async def respond_to_question_stream(request: Request, body: ChildResponseRequest):
+    """
+    Streaming /respond for voice clients: NDJSON, one {"text": ...} line per
+    sentence as soon as it is generated (TTS can start speaking immediately),
+    then a final {"done": true, ...} line with the turn metadata.
+    """
+    logger.info("Streaming response: session=%s", body.session_id)
+
+    service = get_conversational_lesson_service()
+    turn = service.stream_response(
+        session_id=body.session_id,
+        transcript=body.transcript,
+    )
+
+    async def ndjson():
+        try:
+            async for item in turn:
+                if isinstance(item, str):
+                    line = {"text": item}
+                else:
+                    line = {
+                        "done": True,
+                        "text": item.text,
+                        "response_type": item.response_type,
+                        "lesson_language": item.lesson_language,
+                        "is_complete": item.is_lesson_complete,
+                    }
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+        except AIServiceError as e:
+            # Headers are already sent — report the failure in-band.
+            yield json.dumps({"error": str(e), "state": "AI_SERVICE_ERROR"}) + "\n"
+
+    # Content-Encoding: identity keeps GZipMiddleware from buffering the stream.
+    return StreamingResponse(
+        ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Content-Encoding": "identity"},
     )
 
 
 @lesson_router.post("/silence", response_model=DynamicLessonResponse)
 @limiter.limit("30/minute")
-async def handle_silence(request: Request, body: SilenceNotificationRequest):
+def handle_silence(request: Request, body: SilenceNotificationRequest):
     """Handle child silence — AI responds naturally with patience."""
-    logger.info(f"Handling silence: session={body.session_id} duration={body.silence_duration}s")
+    logger.info("Handling silence: session=%s duration=%ss", body.session_id, body.silence_duration)
 
     service = get_conversational_lesson_service()
     response = service.handle_silence(
@@ -335,25 +395,7 @@ async def handle_silence(request: Request, body: SilenceNotificationRequest):
         duration=body.silence_duration,
     )
 
-    return DynamicLessonResponse(
-        status="success",
-        message="Silence handled",
-        data=LessonResponseData(
-            learno_response=LearnoResponseData(
-                text=response.text,
-                messages=[
-                    MessageChunkData(text=c.text, delay_ms=c.delay_ms)
-                    for c in response.messages
-                ],
-                response_type=response.response_type,
-                generated_image_url=response.image_url,
-                image_position=response.image_position,
-                lesson_language=response.lesson_language,
-            ),
-            progress=None,
-            is_complete=response.is_lesson_complete,
-        )
-    )
+    return _lesson_response(response, "Silence handled")
 
 
 # =============================================================================
@@ -12,8 +12,9 @@ Architecture:
 """
 
 import logging
+import re
 from dataclasses import dataclass, field
-from typing import List, Dict, Tuple, Optional
+from typing import AsyncIterator, List, Dict, Tuple, Optional, Union
 
 from app.services.session_service import get_session_service
 from app.services.image_service import get_image_service
@@ -32,8 +33,12 @@ import app.services.analytics_service as analytics_svc
 
 logger = logging.getLogger(__name__)
 
+# Whitespace following sentence-ending punctuation (incl. Arabic "؟") — where a
+# streamed reply can be cut into speakable sentences.
+_SENTENCE_BREAK_RE = re.compile(r"(?<=[.!?؟])\s+")
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class LearnoResponse:
     text: str
     response_type: str
@@ -45,7 +50,7 @@ class LearnoResponse:
     image_position: Optional[int] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ConversationContext:
     """Per-session conversational state — replaces TeachingState."""
     child_name: str
@@ -114,7 +119,7 @@ class ConversationalLessonService:
                     ],
                 }
         except Exception as e:
-            logger.warning(f"Topic info load failed for {grade}/{subject}/{lesson}: {e}")
+            logger.warning("Topic info load failed for %s/%s/%s: %s", grade, subject, lesson, e)
 
         return {
             "title": lesson,
@@ -144,9 +149,8 @@ class ConversationalLessonService:
             image_position=image_position,
         )
 
-    def _call_ai(self, ctx: ConversationContext) -> str:
-        """Call GPT-4o with full conversational context."""
-        messages = build_conversational_prompt(
+    def _build_messages(self, ctx: ConversationContext) -> List[Dict[str, str]]:
+        return build_conversational_prompt(
             child_name=ctx.child_name,
             grade=ctx.grade,
             subject=ctx.subject,
@@ -157,7 +161,10 @@ class ConversationalLessonService:
             conversation_history=ctx.conversation_history,
             turn_count=ctx.turn_count,
         )
-        return self.ai_client.generate_response(messages)
+
+    def _call_ai(self, ctx: ConversationContext) -> str:
+        """Call GPT-4o with full conversational context."""
+        return self.ai_client.generate_response(self._build_messages(ctx))
 
     @staticmethod
     def _parse_markers(text: str) -> Tuple[str, List[str]]:
@@ -240,7 +247,7 @@ class ConversationalLessonService:
                 finally:
                     db.close()
             except Exception as e:
-                logger.warning(f"Analytics start failed: {e}")
+                logger.warning("Analytics start failed: %s", e)
 
         return session, self._make_response(
             text=clean,
@@ -254,6 +261,52 @@ class ConversationalLessonService:
         Full conversation history → GPT-4o → contextual next message.
         """
         ctx = self._get_context(session_id)
+        self._begin_response(ctx, transcript)
+
+        # Call AI with full context
+        return self._finish_response(ctx, self._call_ai(ctx))
+
+    def stream_response(
+        self, session_id: str, transcript: str
+    ) -> AsyncIterator[Union[str, LearnoResponse]]:
+        """
+        Streaming variant of process_response.
+        Yields each sentence as soon as GPT-4o completes it (markers stripped),
+        then the final LearnoResponse once the history has been updated.
+        The session is looked up eagerly so unknown sessions fail before streaming.
+        """
+        ctx = self._get_context(session_id)
+        return self._stream_turn(ctx, transcript)
+
+    async def _stream_turn(
+        self, ctx: ConversationContext, transcript: str
+    ) -> AsyncIterator[Union[str, LearnoResponse]]:
+        self._begin_response(ctx, transcript)
+
+        parts: List[str] = []
+        pending = ""  # text after the last sentence break
+        async for delta in self.ai_client.stream_response(self._build_messages(ctx)):
+            parts.append(delta)
+            # Any earlier break was already cut off, so only the new delta can
+            # hold one (the lookbehind still sees the punctuation before it).
+            start = len(pending)
+            pending += delta
+            cut = 0
+            for match in _SENTENCE_BREAK_RE.finditer(pending, start):
+                clean, _ = self._parse_markers(pending[cut:match.start()])
+                if clean:
+                    yield clean
+                cut = match.end()
+            if cut:
+                pending = pending[cut:]
+
+        clean, _ = self._parse_markers(pending)
+        if clean:
+            yield clean
+
+        yield self._finish_response(ctx, "".join(parts).strip())
+
+    def _begin_response(self, ctx: ConversationContext, transcript: str) -> None:
         ctx.total_turns += 1
 
         # Add child's message to the conversation history
@@ -268,8 +321,7 @@ class ConversationalLessonService:
             if self._child_signals_ready(transcript) or ctx.turn_count >= 5:
                 ctx.lesson_stage = "teaching"
 
-        # Call AI with full context
-        ai_text = self._call_ai(ctx)
+    def _finish_response(self, ctx: ConversationContext, ai_text: str) -> LearnoResponse:
         clean, markers = self._parse_markers(ai_text)
 
         # Interpret markers
@@ -372,13 +424,27 @@ class ConversationalLessonService:
                 finally:
                     db.close()
             except Exception as e:
-                logger.warning(f"Analytics end failed: {e}")
+                logger.warning("Analytics end failed: %s", e)
 
         if session_id in self._contexts:
             del self._contexts[session_id]
         self.session_service.delete_session(session_id)
         return summary, message
 
+    def prune_contexts(self) -> int:
+        """
+        Drop contexts whose session has expired or been evicted from the store
+        without end_lesson being called. Returns the number dropped.
+        """
+        live = self.session_service.session_ids()
+        stale = [sid for sid in list(self._contexts) if sid not in live]
+        for sid in stale:
+            self._contexts.pop(sid, None)
+            self._analytics_map.pop(sid, None)
+        if stale:
+            logger.info("Dropped %s orphaned conversation contexts", len(stale))
+        return len(stale)
+
 
 _service: Optional[ConversationalLessonService] = None
 
@@ -388,3 +454,8 @@ def get_conversational_lesson_service() -> ConversationalLessonService:
     if _service is None:
         _service = ConversationalLessonService()
     return _service
+
+
+def prune_conversation_contexts() -> int:
+    """Session sweep hook — a no-op until the service has been created."""
+    return _service.prune_contexts() if _service is not None else 0
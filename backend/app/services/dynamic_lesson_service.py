@@ -8,16 +8,24 @@ FIXED VERSION - All imports corrected
 
 import logging
 import re
+import sys
+import threading
+import time
+import orjson
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
 from typing import Tuple, Optional, Dict, List
 from dataclasses import dataclass, field
 
+from app.config import settings
 from app.database.session import SessionLocal
 import app.services.analytics_service as analytics_svc
 
 from app.models.lesson_content import (
     ChapterContent, ConceptContent, PracticeQuestion,
     ConceptPhase, LessonPhase,
-    get_chapter, is_chapter_available
+    get_chapter, is_chapter_available, AVAILABLE_CHAPTERS
 )
 from app.models.curriculum import is_valid_topic, find_topic_by_name, get_topic
 from app.ai.chapter_generator import generate_chapter
@@ -36,7 +44,9 @@ from app.ai.dynamic_prompt_builder import (
     build_chapter_review_prompt,
     build_celebration_prompt,
     build_hint_prompt,
-    build_encouragement_prompt
+    build_encouragement_prompt,
+    PROMPT_MAX_TOKENS,
+    PROMPT_MODEL_MAP,
 )
 from app.utils.exceptions import LessonNotAvailableError
 
@@ -50,8 +60,36 @@ _TEACHING_PHASES = {
     ConceptPhase.VISUAL_EXAMPLE,
 }
 
+_NUMBER_RE = re.compile(r'\d+')
 
-@dataclass
+_CELEBRATION_IMAGE_PROMPT = "Celebration scene with confetti, stars, trophy, cartoon style"
+
+# A complete JSON string followed by the next item or the end of the array
+_JSON_LINE_RE = re.compile(r'"((?:[^"\\]|\\.)*)"\s*(?=[,\]])')
+
+
+def _complete_narration_lines(ai_text: str) -> List[str]:
+    """The narration lines that were fully written before a JSON reply broke off."""
+    key = ai_text.find('"narration_lines"')
+    start = ai_text.find("[", key) if key >= 0 else -1
+    if start < 0:
+        return []
+    lines = []
+    for match in _JSON_LINE_RE.finditer(ai_text, start + 1):
+        try:
+            lines.append(orjson.loads(match.group(0)))
+        except orjson.JSONDecodeError:
+            break
+    return lines
+
+
+@lru_cache(maxsize=1024)
+def _answer_pattern(acceptable_answers: Tuple[str, ...]) -> "re.Pattern[str]":
+    """One alternation over a question's acceptable answers, compiled once per answer set."""
+    return re.compile("|".join(re.escape(a) for a in acceptable_answers))
+
+
+@dataclass(slots=True)
 class TeachingState:
     """Tracks where we are in teaching the chapter"""
     lesson_phase: LessonPhase = LessonPhase.WELCOME
@@ -71,8 +109,14 @@ class TeachingState:
 
     current_expected_answer: Optional[str] = None
     current_acceptable_answers: List[str] = field(default_factory=list)
+    current_acceptable_set: frozenset = frozenset()
     current_hint: str = ""
 
+    # Resolved once per session; see DynamicLessonService._session_chapter
+    chapter: Optional[ChapterContent] = None
+    # time.monotonic() of the last turn, for expiring abandoned sessions
+    last_active: float = 0.0
+
     def reset_attempts(self):
         self.current_attempts = 0
         self.consecutive_wrong = 0
@@ -90,7 +134,7 @@ class TeachingState:
             self.needs_extra_help = True
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class LearnoResponse:
     """Response from Learno, including split message chunks for sequential display."""
     text: str
@@ -105,20 +149,75 @@ class LearnoResponse:
 class DynamicLessonService:
     """Manages comprehensive teaching flow."""
 
+    # Upper bound on in-memory teaching states (abandoned sessions never call end_lesson)
+    MAX_TEACHING_STATES = 10_000
+    # Concurrent DALL-E requests while prewarming a chapter
+    PREWARM_WORKERS = 2
+
     def __init__(self):
         self.session_service = get_session_service()
         self.image_service = get_image_service()
         self.ai_client = get_ai_client()
         self._splitter = get_message_splitter()
-        self._teaching_states: Dict[str, TeachingState] = {}
+        # Least recently active first; trimmed in _get_state
+        self._teaching_states: "OrderedDict[str, TeachingState]" = OrderedDict()
+        # Route handlers run in the threadpool, so the LRU is shared across threads
+        self._states_lock = threading.Lock()
         # Maps in-memory session_id -> (child_id, analytics_db_session_id)
         self._analytics_map: Dict[str, tuple] = {}
+        self._prefetch_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="lesson-prefetch")
+        # DALL-E calls take 10-20 s, so they get their own workers and never
+        # queue ahead of a turn's text generation.
+        self._image_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="lesson-images")
+        # Next-phase generation started while the child is still on the current
+        # content phase: session_id -> (kind, messages, future); locked like
+        # _pending_images, since prefetches and route threads share it
+        self._prefetched: Dict[str, Tuple[str, List[Dict[str, str]], Future]] = {}
+        self._prefetch_lock = threading.Lock()
+        # Content pictures started before/alongside the text call:
+        # session_id -> {prompt: future}; shared by route threads, so locked
+        self._pending_images: Dict[str, Dict[str, Future]] = {}
+        self._pending_lock = threading.Lock()
+        self._phase_handlers = {
+            ConceptPhase.INTRODUCTION: self._do_introduction,
+            ConceptPhase.EXPLANATION: self._do_explanation,
+            ConceptPhase.VISUAL_EXAMPLE: self._do_visual_example,
+            ConceptPhase.GUIDED_PRACTICE: self._do_guided_practice,
+            ConceptPhase.INDEPENDENT_PRACTICE: self._do_independent_practice,
+            ConceptPhase.CONCEPT_CHECK: self._do_mastery_check,
+        }
         logger.info("DynamicLessonService initialized")
 
     def _get_state(self, session_id: str) -> TeachingState:
-        if session_id not in self._teaching_states:
-            self._teaching_states[session_id] = TeachingState()
-        return self._teaching_states[session_id]
+        now = time.monotonic()
+        with self._states_lock:
+            state = self._teaching_states.get(session_id)
+            if state is None:
+                state = self._teaching_states[session_id] = TeachingState()
+            else:
+                self._teaching_states.move_to_end(session_id)
+            state.last_active = now
+            evicted = self._evict_states(now)
+        for old_id in evicted:
+            self._discard_prefetch(old_id)
+            self._discard_images(old_id)
+        return state
+
+    def _evict_states(self, now: float) -> List[str]:
+        """
+        Drop states idle past the session timeout, then the oldest beyond the cap.
+        Called with _states_lock held; returns the evicted session ids.
+        """
+        cutoff = now - settings.SESSION_TIMEOUT_SECONDS
+        evicted = []
+        while self._teaching_states:
+            session_id, oldest = next(iter(self._teaching_states.items()))
+            if oldest.last_active >= cutoff and len(self._teaching_states) <= self.MAX_TEACHING_STATES:
+                break
+            del self._teaching_states[session_id]
+            self._analytics_map.pop(session_id, None)
+            evicted.append(session_id)
+        return evicted
 
     def _get_progress_info(self, state: TeachingState, chapter: ChapterContent) -> Dict:
         return {
@@ -174,9 +273,15 @@ class DynamicLessonService:
             return generate_chapter(grade, subject, topic.topic_id, topic.name_en)
 
         # Final fallback — shouldn't reach here after validation in start_lesson
-        logger.warning(f"Falling back to counting chapter for {grade}/{subject}/{lesson}")
+        logger.warning("Falling back to counting chapter for %s/%s/%s", grade, subject, lesson)
         return get_chapter("counting")
 
+    def _session_chapter(self, session, state: TeachingState) -> ChapterContent:
+        """The session's chapter, resolved on first use and kept on its TeachingState."""
+        if state.chapter is None:
+            state.chapter = self._get_chapter_for_session(session.grade, session.subject, session.lesson)
+        return state.chapter
+
     def start_lesson(
         self,
         grade: int,
@@ -198,6 +303,7 @@ class DynamicLessonService:
         chapter = self._get_chapter_for_session(grade, subject, lesson)
 
         state = self._get_state(session.session_id)
+        state.chapter = chapter
         state.lesson_phase = LessonPhase.WELCOME
 
         messages = build_welcome_prompt(
@@ -208,16 +314,13 @@ class DynamicLessonService:
             subject=subject,
         )
 
-        ai_text = self.ai_client.generate_response(messages)
+        ai_text = self._generate("welcome", messages, cacheable=True)
         clean_text, image_url = self._process_response(ai_text)
 
         state.lesson_phase = LessonPhase.TEACHING
         state.current_concept_index = 0
         state.concept_phase = ConceptPhase.INTRODUCTION
 
-        session.total_steps = chapter.total_concepts * 6
-        self.session_service.update_session(session)
-
         # Persist analytics session if child_id provided
         if child_id is not None:
             try:
@@ -234,7 +337,7 @@ class DynamicLessonService:
                 finally:
                     db.close()
             except Exception as e:
-                logger.warning(f"Analytics session start failed: {e}")
+                logger.warning("Analytics session start failed: %s", e)
 
         return session, self._make_response(
             text=clean_text,
@@ -248,7 +351,14 @@ class DynamicLessonService:
 
         session = self.session_service.get_session(session_id)
         state = self._get_state(session_id)
-        chapter = self._get_chapter_for_session(session.grade, session.subject, session.lesson)
+        chapter = self._session_chapter(session, state)
+
+        # A completed concept moves straight on to the next one in the same turn
+        if state.concept_phase == ConceptPhase.COMPLETED \
+                and state.current_concept_index < chapter.total_concepts:
+            state.current_concept_index += 1
+            state.concept_phase = ConceptPhase.INTRODUCTION
+            state.reset_attempts()
 
         if state.current_concept_index >= chapter.total_concepts:
             if state.lesson_phase != LessonPhase.CHAPTER_REVIEW:
@@ -257,26 +367,8 @@ class DynamicLessonService:
             return self._do_chapter_review(session_id, state, chapter)
 
         concept = chapter.concepts[state.current_concept_index]
-
-        if state.concept_phase == ConceptPhase.INTRODUCTION:
-            return self._do_introduction(session_id, state, concept, chapter)
-        elif state.concept_phase == ConceptPhase.EXPLANATION:
-            return self._do_explanation(session_id, state, concept, chapter)
-        elif state.concept_phase == ConceptPhase.VISUAL_EXAMPLE:
-            return self._do_visual_example(session_id, state, concept, chapter)
-        elif state.concept_phase == ConceptPhase.GUIDED_PRACTICE:
-            return self._do_guided_practice(session_id, state, concept, chapter)
-        elif state.concept_phase == ConceptPhase.INDEPENDENT_PRACTICE:
-            return self._do_independent_practice(session_id, state, concept, chapter)
-        elif state.concept_phase == ConceptPhase.CONCEPT_CHECK:
-            return self._do_mastery_check(session_id, state, concept, chapter)
-        elif state.concept_phase == ConceptPhase.COMPLETED:
-            state.current_concept_index += 1
-            state.concept_phase = ConceptPhase.INTRODUCTION
-            state.reset_attempts()
-            return self.continue_teaching(session_id)
-
-        return self._do_introduction(session_id, state, concept, chapter)
+        handler = self._phase_handlers.get(state.concept_phase, self._do_introduction)
+        return handler(session_id, state, concept, chapter)
 
     def _do_introduction(self, session_id: str, state: TeachingState,
                          concept: ConceptContent, chapter: ChapterContent) -> LearnoResponse:
@@ -288,10 +380,11 @@ class DynamicLessonService:
             grade=session.grade,
             subject=session.subject,
         )
-        ai_text = self.ai_client.generate_response(messages)
+        ai_text = self._generate("intro", messages, cacheable=True)
         clean_text, image_url = self._process_response(ai_text)
 
         state.concept_phase = ConceptPhase.EXPLANATION
+        self._prefetch(session_id, "explanation", self._explanation_prompt(session, concept))
 
         return self._make_response(
             text=clean_text,
@@ -303,18 +396,14 @@ class DynamicLessonService:
     def _do_explanation(self, session_id: str, state: TeachingState,
                         concept: ConceptContent, chapter: ChapterContent) -> LearnoResponse:
         session = self.session_service.get_session(session_id)
-        messages = build_explanation_prompt(
-            concept_name=concept.concept_name,
-            explanation_script=concept.explanation_script,
-            key_points=concept.key_points,
-            examples=concept.examples,
-            grade=session.grade,
-            subject=session.subject,
-        )
-        ai_text = self.ai_client.generate_response(messages)
+        messages = self._explanation_prompt(session, concept)
+        ai_text = self._generate("explanation", messages, session_id=session_id)
         clean_text, image_url = self._process_response(ai_text)
 
         state.concept_phase = ConceptPhase.VISUAL_EXAMPLE
+        self._prefetch(session_id, "visual", self._visual_prompt(session, concept), json_mode=True)
+        # The picture is fixed by the content too — start it alongside.
+        self._start_image(session_id, concept.visual_description)
 
         return self._make_response(
             text=clean_text,
@@ -326,19 +415,17 @@ class DynamicLessonService:
     def _do_visual_example(self, session_id: str, state: TeachingState,
                            concept: ConceptContent, chapter: ChapterContent) -> LearnoResponse:
         session = self.session_service.get_session(session_id)
-        messages = build_visual_explanation_prompt(
-            concept_name=concept.concept_name,
-            visual_description=concept.visual_description,
-            visual_explanation=concept.visual_explanation,
-            grade=session.grade,
-            subject=session.subject,
+        messages = self._visual_prompt(session, concept)
+        self._start_image(session_id, concept.visual_description)
+        ai_text = self._generate("visual", messages, json_mode=True, session_id=session_id)
+        clean_text, image_url = self._process_json_response(
+            ai_text, concept.visual_description, session_id, fallback_text=concept.visual_explanation
         )
-        ai_text = self.ai_client.generate_response(messages)
-        clean_text = self.image_service.remove_image_marker(ai_text)
-        image_url, _ = self.image_service.generate_image_sync(concept.visual_description)
 
         state.concept_phase = ConceptPhase.GUIDED_PRACTICE
         state.guided_question_index = 0
+        if concept.guided_questions:
+            self._prefetch(session_id, "guided", self._guided_prompt(session, state, concept), json_mode=True)
 
         return self._make_response(
             text=clean_text,
@@ -357,18 +444,16 @@ class DynamicLessonService:
         question = concept.guided_questions[state.guided_question_index]
 
         session = self.session_service.get_session(session_id)
-        messages = build_guided_practice_prompt(
-            question=question,
-            concept_name=concept.concept_name,
-            is_first=(state.guided_question_index == 0),
-            grade=session.grade,
-            subject=session.subject,
+        messages = self._guided_prompt(session, state, concept)
+        self._start_image(session_id, question.image_prompt)
+        ai_text = self._generate("guided", messages, json_mode=True, session_id=session_id)
+        clean_text, image_url = self._process_json_response(
+            ai_text, question.image_prompt, session_id, fallback_text=question.question_text
         )
-        ai_text = self.ai_client.generate_response(messages)
-        clean_text, image_url = self._process_response(ai_text, question.image_prompt)
 
         state.current_expected_answer = question.expected_answer
         state.current_acceptable_answers = question.acceptable_answers
+        state.current_acceptable_set = question.acceptable_set
         state.current_hint = question.hint_text
 
         return self._make_response(
@@ -395,11 +480,15 @@ class DynamicLessonService:
             grade=session.grade,
             subject=session.subject,
         )
-        ai_text = self.ai_client.generate_response(messages)
-        clean_text, image_url = self._process_response(ai_text, question.image_prompt)
+        self._start_image(session_id, question.image_prompt)
+        ai_text = self._generate("independent", messages, json_mode=True)
+        clean_text, image_url = self._process_json_response(
+            ai_text, question.image_prompt, session_id, fallback_text=question.question_text
+        )
 
         state.current_expected_answer = question.expected_answer
         state.current_acceptable_answers = question.acceptable_answers
+        state.current_acceptable_set = question.acceptable_set
         state.current_hint = question.hint_text
 
         return self._make_response(
@@ -418,11 +507,12 @@ class DynamicLessonService:
             grade=session.grade,
             subject=session.subject,
         )
-        ai_text = self.ai_client.generate_response(messages)
+        ai_text = self._generate("mastery", messages)
         clean_text, image_url = self._process_response(ai_text)
 
         state.current_expected_answer = concept.mastery_answer
         state.current_acceptable_answers = concept.mastery_acceptable
+        state.current_acceptable_set = concept.mastery_acceptable_set
         state.current_hint = "Think about what we just learned!"
 
         return self._make_response(
@@ -448,11 +538,12 @@ class DynamicLessonService:
             grade=session.grade,
             subject=session.subject,
         )
-        ai_text = self.ai_client.generate_response(messages)
+        ai_text = self._generate("review", messages)
         clean_text, image_url = self._process_response(ai_text)
 
         state.current_expected_answer = question.expected_answer
         state.current_acceptable_answers = question.acceptable_answers
+        state.current_acceptable_set = question.acceptable_set
         state.current_hint = question.hint_text
 
         return self._make_response(
@@ -472,14 +563,11 @@ class DynamicLessonService:
             grade=session.grade,
             subject=session.subject,
         )
-        ai_text = self.ai_client.generate_response(messages)
-        clean_text, image_url = self._process_response(ai_text)
-
-        if not image_url:
-            img_url, _ = self.image_service.generate_image_sync(
-                "Celebration scene with confetti, stars, trophy, cartoon style"
-            )
-            image_url = img_url
+        # The celebration scene is fixed, so it is started before the text call;
+        # any picture marker in the reply is stripped, not drawn.
+        self._start_image(session_id, _CELEBRATION_IMAGE_PROMPT)
+        ai_text = self._generate("celebration", messages, cacheable=True)
+        clean_text, image_url = self._process_response(ai_text, _CELEBRATION_IMAGE_PROMPT, session_id)
 
         state.lesson_phase = LessonPhase.COMPLETED
 
@@ -503,7 +591,7 @@ class DynamicLessonService:
         """
         session = self.session_service.get_session(session_id)
         state = self._get_state(session_id)
-        chapter = self._get_chapter_for_session(session.grade, session.subject, session.lesson)
+        chapter = self._session_chapter(session, state)
 
         # Teaching phase: child acknowledged/responded → advance to next content.
         # Guard against chapter-review and celebration where concept_phase may
@@ -531,18 +619,29 @@ class DynamicLessonService:
         if not state.current_expected_answer:
             return True
 
-        normalized = transcript.lower().strip()
+        normalized = sys.intern(transcript.lower().strip())
 
-        if normalized == state.current_expected_answer.lower():
+        # Content answers are stored normalized (see PracticeQuestion)
+        if normalized == state.current_expected_answer:
             return True
 
-        for acceptable in state.current_acceptable_answers:
-            if acceptable.lower() in normalized or normalized in acceptable.lower():
+        if normalized in state.current_acceptable_set:
+            return True
+
+        acceptable_answers = tuple(state.current_acceptable_answers)
+        if acceptable_answers:
+            # An acceptable answer anywhere in the transcript ("I think it's five")
+            if _answer_pattern(acceptable_answers).search(normalized):
+                return True
+            # ...or a partial transcript of a longer answer
+            if any(normalized in acceptable for acceptable in acceptable_answers):
                 return True
 
-        numbers = re.findall(r'\d+', transcript)
-        if numbers and state.current_expected_answer in numbers:
-            return True
+        # A number said inside a sentence ("it's 5 apples") — only for numeric answers
+        if state.current_expected_answer.isdigit():
+            for match in _NUMBER_RE.finditer(transcript):
+                if match.group() == state.current_expected_answer:
+                    return True
 
         return False
 
@@ -561,12 +660,17 @@ class DynamicLessonService:
             subject=session.subject,
             child_transcript=transcript,
         )
-        ai_text = self.ai_client.generate_response(messages)
-        praise_text, _ = self._process_response(ai_text)
+        # The praise doesn't depend on what comes next, so generate it while
+        # the next step is being produced.
+        # Not cached: the same words twice in a concept must not earn the same praise.
+        praise_future = self._prefetch_pool.submit(self._generate, "encouragement", messages)
 
         self._advance_after_correct(state)
         next_response = self.continue_teaching(session_id)
 
+        ai_text = self._background_text(praise_future, "encouragement", messages)
+        praise_text, _ = self._process_response(ai_text)
+
         # Combine praise + next content with a paragraph break so the splitter
         # treats them as distinct segments.
         combined_text = f"{praise_text}\n\n{next_response.text}"
@@ -591,7 +695,7 @@ class DynamicLessonService:
             grade=session.grade,
             subject=session.subject,
         )
-        ai_text = self.ai_client.generate_response(messages)
+        ai_text = self._generate("hint", messages)
         clean_text, image_url = self._process_response(ai_text)
 
         return self._make_response(
@@ -616,7 +720,7 @@ class DynamicLessonService:
     def handle_silence(self, session_id: str, duration: float) -> LearnoResponse:
         session = self.session_service.get_session(session_id)
         state = self._get_state(session_id)
-        chapter = self._get_chapter_for_session(session.grade, session.subject, session.lesson)
+        chapter = self._session_chapter(session, state)
 
         hint_text = state.current_hint or "Take your time! You can do it! 😊"
 
@@ -630,7 +734,7 @@ class DynamicLessonService:
             grade=session.grade,
             subject=session.subject,
         )
-        ai_text = self.ai_client.generate_response(messages)
+        ai_text = self._generate("hint", messages)
         clean_text, image_url = self._process_response(ai_text)
 
         return self._make_response(
@@ -640,18 +744,208 @@ class DynamicLessonService:
             progress_info=self._get_progress_info(state, chapter),
         )
 
-    def _process_response(self, ai_text: str, force_image_prompt: str = None) -> Tuple[str, Optional[str]]:
+    # ------------------------------------------------------------------
+    # Prompts for phases fully determined by the chapter content — shared by
+    # the phase handlers and the prefetcher so both build identical messages.
+    # ------------------------------------------------------------------
+
+    def _explanation_prompt(self, session, concept: ConceptContent) -> List[Dict[str, str]]:
+        return build_explanation_prompt(
+            concept_name=concept.concept_name,
+            explanation_script=concept.explanation_script,
+            key_points=concept.key_points,
+            examples=concept.examples,
+            grade=session.grade,
+            subject=session.subject,
+        )
+
+    def _visual_prompt(self, session, concept: ConceptContent) -> List[Dict[str, str]]:
+        return build_visual_explanation_prompt(
+            concept_name=concept.concept_name,
+            visual_description=concept.visual_description,
+            visual_explanation=concept.visual_explanation,
+            grade=session.grade,
+            subject=session.subject,
+        )
+
+    def _guided_prompt(self, session, state: TeachingState,
+                       concept: ConceptContent) -> List[Dict[str, str]]:
+        return build_guided_practice_prompt(
+            question=concept.guided_questions[state.guided_question_index],
+            concept_name=concept.concept_name,
+            is_first=(state.guided_question_index == 0),
+            grade=session.grade,
+            subject=session.subject,
+        )
+
+    def _prefetch(self, session_id: str, kind: str, messages: List[Dict[str, str]],
+                  json_mode: bool = False):
+        """Start generating the next phase in the background; _generate picks it up."""
+        future = self._prefetch_pool.submit(self._generate, kind, messages, json_mode=json_mode)
+        with self._prefetch_lock:
+            entry = self._prefetched.get(session_id)
+            self._prefetched[session_id] = (kind, messages, future)
+        if entry:
+            entry[2].cancel()
+
+    def _discard_prefetch(self, session_id: str):
+        with self._prefetch_lock:
+            entry = self._prefetched.pop(session_id, None)
+        if entry:
+            entry[2].cancel()
+
+    def _generate(self, kind: str, messages: List[Dict[str, str]],
+                  cacheable: bool = False, json_mode: bool = False,
+                  session_id: Optional[str] = None) -> str:
+        """Call the AI with the model tier and output budget configured for this prompt kind.
+
+        With a session_id, a matching prefetched generation is used instead of a new call.
+        """
+        if session_id is not None:
+            with self._prefetch_lock:
+                entry = self._prefetched.pop(session_id, None)
+            if entry and entry[0] == kind and entry[1] == messages:
+                return self._background_text(entry[2], kind, messages, json_mode=json_mode)
+            if entry:
+                entry[2].cancel()
+
+        return self.ai_client.generate_response(
+            messages,
+            cacheable=cacheable,
+            model=PROMPT_MODEL_MAP.get(kind),
+            max_tokens=PROMPT_MAX_TOKENS.get(kind),
+            json_mode=json_mode,
+        )
+
+    def _background_text(self, future: Future, kind: str, messages: List[Dict[str, str]],
+                         json_mode: bool = False) -> str:
+        """
+        Result of a generation started on the prefetch pool. One that is still
+        queued is cancelled and made inline rather than waited for; a failed
+        one is retried inline.
+        """
+        if not future.cancel():
+            try:
+                return future.result()
+            except Exception as e:
+                logger.warning("Background %s generation failed, retrying: %s", kind, e)
+        return self._generate(kind, messages, json_mode=json_mode)
+
+    def _process_json_response(self, ai_text: str, image_prompt: Optional[str],
+                               session_id: Optional[str] = None,
+                               fallback_text: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        """
+        Read {"narration_lines": [...]} from a JSON-mode reply. The picture comes
+        from the lesson content, so the model never has to emit an image marker.
+        Prose replies fall back to marker parsing, still with the authored
+        picture. A JSON reply that does not
+        parse (usually cut off at the token limit) is replaced by fallback_text,
+        the authored content for the step, or else by its complete lines — raw
+        JSON is never narrated.
+        """
+        try:
+            lines = orjson.loads(ai_text)["narration_lines"]
+        except (orjson.JSONDecodeError, KeyError, TypeError):
+            lines = None
+        if not isinstance(lines, list):
+            if not ai_text.lstrip().startswith("{"):
+                return self._process_response(ai_text, image_prompt, session_id)
+            logger.warning("Unparseable JSON narration (%d chars), using fallback", len(ai_text))
+            lines = [fallback_text] if fallback_text else _complete_narration_lines(ai_text)
+
+        clean_text = "\n\n".join(str(line).strip() for line in lines if str(line).strip())
+        return clean_text, self._content_image(session_id, image_prompt)
+
+    def _start_image(self, session_id: Optional[str], image_prompt: Optional[str]):
+        """
+        Begin generating a content picture on the image pool so the image
+        request overlaps the text call instead of following it.
+        """
+        if not image_prompt:
+            return
+        with self._pending_lock:
+            pending = self._pending_images.setdefault(session_id, {})
+            if image_prompt not in pending:
+                pending[image_prompt] = self._image_pool.submit(
+                    self.image_service.generate_image_sync, image_prompt
+                )
+
+    def _take_image(self, session_id: Optional[str], image_prompt: str) -> Optional[Future]:
+        """Remove and return this session's in-flight future for a prompt, if any."""
+        with self._pending_lock:
+            pending = self._pending_images.get(session_id)
+            if not pending:
+                return None
+            future = pending.pop(image_prompt, None)
+            if not pending:
+                del self._pending_images[session_id]
+            return future
+
+    def _discard_images(self, session_id: str):
+        with self._pending_lock:
+            pending = self._pending_images.pop(session_id, None)
+        for future in (pending or {}).values():
+            future.cancel()
+
+    def _content_image(self, session_id: Optional[str], image_prompt: Optional[str]) -> Optional[str]:
+        """URL for a content picture — from the in-flight request if one was started."""
+        if not image_prompt:
+            return None
+        future = self._take_image(session_id, image_prompt)
+        if future is not None:
+            try:
+                return future.result()[0]
+            except Exception as e:
+                logger.warning("Background image generation failed, retrying: %s", e)
+        image_url, _ = self.image_service.generate_image_sync(image_prompt)
+        return image_url
+
+    def prewarm_images(self, chapter: ChapterContent) -> int:
+        """
+        Generate every fixed picture a chapter can ask for (concept visuals,
+        practice and review question images, the celebration scene) so the
+        lesson itself only ever hits the image cache.
+
+        Runs on its own short-lived pool of PREWARM_WORKERS threads, so it
+        never competes with live lessons for the text or image workers.
+        Returns the number of prompts generated.
+        """
+        prompts: Dict[str, str] = {}
+        candidates = [_CELEBRATION_IMAGE_PROMPT]
+        for concept in chapter.concepts:
+            candidates.append(concept.visual_description)
+            candidates.extend(q.image_prompt for q in concept.guided_questions)
+            candidates.extend(q.image_prompt for q in concept.independent_questions)
+        candidates.extend(q.image_prompt for q in chapter.review_questions)
+        for prompt in candidates:
+            if prompt:
+                prompts.setdefault(self.image_service.cache_key(prompt), prompt)
+
+        with ThreadPoolExecutor(max_workers=self.PREWARM_WORKERS,
+                                thread_name_prefix="image-prewarm") as pool:
+            futures = [
+                pool.submit(self.image_service.generate_image_sync, prompt)
+                for prompt in prompts.values()
+            ]
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.warning("Image prewarm failed: %s", e)
+        logger.info("Prewarmed %d images for chapter %s", len(futures), chapter.chapter_id)
+        return len(futures)
+
+    def _process_response(self, ai_text: str, force_image_prompt: str = None,
+                          session_id: Optional[str] = None) -> Tuple[str, Optional[str]]:
         image_url = None
-        clean_text = ai_text
 
-        image_desc = self.image_service.extract_image_request(ai_text)
-        if image_desc:
-            clean_text = self.image_service.remove_image_marker(ai_text)
-            img_url, _ = self.image_service.generate_image_sync(image_desc)
-            image_url = img_url
-        elif force_image_prompt:
-            img_url, _ = self.image_service.generate_image_sync(force_image_prompt)
-            image_url = img_url
+        image_desc, clean_text = self.image_service.split_image_request(ai_text)
+        if force_image_prompt:
+            # The fixed picture is already in flight (or cached); drawing the
+            # model's marker as well would pay for a second generation.
+            image_url = self._content_image(session_id, force_image_prompt)
+        elif image_desc:
+            image_url, _ = self.image_service.generate_image_sync(image_desc)
 
         return clean_text, image_url
 
@@ -688,10 +982,12 @@ class DynamicLessonService:
                 finally:
                     db.close()
             except Exception as e:
-                logger.warning(f"Analytics session end failed: {e}")
+                logger.warning("Analytics session end failed: %s", e)
 
-        if session_id in self._teaching_states:
-            del self._teaching_states[session_id]
+        with self._states_lock:
+            self._teaching_states.pop(session_id, None)
+        self._discard_prefetch(session_id)
+        self._discard_images(session_id)
 
         self.session_service.delete_session(session_id)
 
@@ -706,3 +1002,12 @@ def get_dynamic_lesson_service() -> DynamicLessonService:
     if _dynamic_lesson_service is None:
         _dynamic_lesson_service = DynamicLessonService()
     return _dynamic_lesson_service
+
+
+def prewarm_chapter_images():
+    """Prewarm the image cache for every static chapter (see PREWARM_IMAGES)."""
+    service = get_dynamic_lesson_service()
+    for chapter_id in AVAILABLE_CHAPTERS:
+        chapter = get_chapter(chapter_id)
+        if chapter is not None:
+            service.prewarm_images(chapter)
@@ -4,6 +4,7 @@ Downloads DALL-E images immediately and serves them from our own permanent URLs,
 preventing display failures when DALL-E URLs expire after ~1 hour.
 """
 
+import os
 import uuid
 import logging
 from pathlib import Path
@@ -21,46 +22,70 @@ def _ensure_dirs() -> None:
     STATIC_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def download_and_cache_sync(dalle_url: str) -> Optional[str]:
+def _image_url(filename: str) -> str:
+    return f"/static/generated_images/{filename}"
+
+
+def _save(filepath: Path, content: bytes) -> None:
+    # Write then rename, so other workers never see a half-written named image.
+    # The temp name is unique so two writers of the same image can't clobber each other.
+    tmp = filepath.with_name(f"{filepath.stem}.{uuid.uuid4().hex}.tmp")
+    try:
+        tmp.write_bytes(content)
+        os.replace(tmp, filepath)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def cached_image_url(name: str) -> Optional[str]:
+    """URL of a previously saved image called `name`, or None if it is not on disk."""
+    filename = f"{name}.png"
+    if (STATIC_DIR / filename).is_file():
+        return _image_url(filename)
+    return None
+
+
+def download_and_cache_sync(dalle_url: str, name: Optional[str] = None) -> Optional[str]:
     """
     Download a DALL-E image and save it locally.
 
-    Returns the relative URL path (/static/generated_images/<uuid>.png)
+    Returns the relative URL path (/static/generated_images/<name or uuid>.png)
     or None if download fails.
     """
     _ensure_dirs()
 
-    filename = f"{uuid.uuid4()}.png"
+    filename = f"{name or uuid.uuid4()}.png"
     filepath = STATIC_DIR / filename
 
     try:
         with httpx.Client(timeout=30, follow_redirects=True) as client:
             response = client.get(dalle_url)
             response.raise_for_status()
-            filepath.write_bytes(response.content)
-            logger.info(f"Proxied image saved: {filename}")
-            return f"/static/generated_images/{filename}"
+            _save(filepath, response.content)
+            logger.info("Proxied image saved: %s", filename)
+            return _image_url(filename)
     except Exception as e:
-        logger.error(f"Image proxy download failed: {e}")
+        logger.error("Image proxy download failed: %s", e)
         return None
 
 
-async def download_and_cache_async(dalle_url: str) -> Optional[str]:
+async def download_and_cache_async(dalle_url: str, name: Optional[str] = None) -> Optional[str]:
     """Async version of download_and_cache_sync."""
     _ensure_dirs()
 
-    filename = f"{uuid.uuid4()}.png"
+    filename = f"{name or uuid.uuid4()}.png"
     filepath = STATIC_DIR / filename
 
     try:
         async with httpx.AsyncClient(timeout=30, follow_redirects=True) as client:
             response = await client.get(dalle_url)
             response.raise_for_status()
-            filepath.write_bytes(response.content)
-            logger.info(f"Proxied image saved: {filename}")
-            return f"/static/generated_images/{filename}"
+            _save(filepath, response.content)
+            logger.info("Proxied image saved: %s", filename)
+            return _image_url(filename)
     except Exception as e:
-        logger.error(f"Image proxy download failed: {e}")
+        logger.error("Image proxy download failed: %s", e)
         return None
 
 
@@ -81,4 +106,4 @@ def cleanup_old_images(days: int = 7) -> None:
             pass
 
     if deleted:
-        logger.info(f"Cleaned up {deleted} expired image(s)")
+        logger.info("Cleaned up %s expired image(s)", deleted)
@@ -8,25 +8,33 @@ Features:
 - Generate educational images from text descriptions
 - Extract [GENERATE_IMAGE: ...] markers from AI responses
 - Child-friendly, cartoon style images
-- Caching to avoid regenerating same images
+- Caching to avoid regenerating same images (in-memory LRU, backed by the
+  proxied files on disk so hits survive restarts and are shared by workers)
 
 =============================================================================
 """
 
+import asyncio
 import logging
 import re
 import hashlib
 import base64
-from typing import Optional, Tuple
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, Optional, Tuple
 from pathlib import Path
 
 import openai
 from app.config import settings
 from app.utils.exceptions import AIServiceError
-from app.services.image_proxy import download_and_cache_sync, download_and_cache_async
+from app.services.image_proxy import cached_image_url, download_and_cache_sync
 
 logger = logging.getLogger(__name__)
 
+_IMAGE_REQUEST_RE = re.compile(r'\[GENERATE_IMAGE:\s*([^\]]+)\]', re.IGNORECASE)
+_IMAGE_MARKER_RE = re.compile(r'\[GENERATE_IMAGE:\s*[^\]]+\]', re.IGNORECASE)
+
 
 class ImageGenerationService:
     """
@@ -51,8 +59,13 @@ class ImageGenerationService:
         self.cache_dir = Path("generated_images")
         self.cache_dir.mkdir(exist_ok=True)
         
-        # In-memory cache for session (with size limit)
-        self._cache: dict = {}
+        # In-memory LRU of cache key -> image URL (with size limit)
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        # Guards _cache: image workers and request threads update it concurrently
+        self._cache_lock = threading.Lock()
+        # Cache key -> result of the generation currently running for it
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
         
         logger.info("ImageGenerationService initialized with DALL-E")
     
@@ -68,12 +81,11 @@ class ImageGenerationService:
         Returns:
             Image description if found, None otherwise
         """
-        pattern = r'\[GENERATE_IMAGE:\s*([^\]]+)\]'
-        match = re.search(pattern, response_text, re.IGNORECASE)
+        match = _IMAGE_REQUEST_RE.search(response_text)
         
         if match:
             description = match.group(1).strip()
-            logger.debug(f"Found image request: {description}")
+            logger.debug("Found image request: %s", description)
             return description
         
         return None
@@ -90,13 +102,57 @@ class ImageGenerationService:
         Returns:
             Cleaned text without the marker
         """
-        pattern = r'\[GENERATE_IMAGE:\s*[^\]]+\]'
-        cleaned = re.sub(pattern, '', response_text, flags=re.IGNORECASE)
+        cleaned = _IMAGE_MARKER_RE.sub('', response_text)
         return cleaned.strip()
     
-    def _get_cache_key(self, description: str) -> str:
-        """Generate a cache key for the image description."""
-        return hashlib.md5(description.lower().encode()).hexdigest()
+    def split_image_request(self, response_text: str) -> Tuple[Optional[str], str]:
+        """
+        Extract the image request and strip every marker in one pass.
+
+        Returns:
+            (description of the first marker or None, cleaned text). Text
+            without a marker is returned unchanged.
+        """
+        descriptions = []
+
+        def _take(match):
+            descriptions.append(match.group(1))
+            return ''
+
+        cleaned = _IMAGE_REQUEST_RE.sub(_take, response_text)
+        if not descriptions:
+            return None, response_text
+        description = descriptions[0].strip()
+        logger.debug("Found image request: %s", description)
+        return description, cleaned.strip()
+
+    def cache_key(self, description: str) -> str:
+        """Cache key for a description; case and spacing differences share one key."""
+        normalized = " ".join(description.lower().split())
+        return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+    def _cached(self, cache_key: str) -> Optional[str]:
+        """Look up an image: memory LRU first, then a proxied file saved under the key."""
+        with self._cache_lock:
+            image_url = self._cache.get(cache_key)
+            if image_url is not None:
+                self._cache.move_to_end(cache_key)
+                return image_url
+
+        image_url = cached_image_url(cache_key)
+        if image_url is not None:
+            self._remember(cache_key, image_url)
+        return image_url
+
+    def _remember(self, cache_key: str, image_url: str):
+        with self._cache_lock:
+            self._cache[cache_key] = image_url
+            self._cache.move_to_end(cache_key)
+            evicted = None
+            if len(self._cache) > self.MAX_CACHE_SIZE:
+                evicted, _ = self._cache.popitem(last=False)
+        if evicted is not None:
+            logger.debug("Cache full, removed: %s", evicted)
     
     def _build_dalle_prompt(self, description: str) -> str:
         """
@@ -114,6 +170,15 @@ class ImageGenerationService:
         return f"{base_style}Content: {description}"
     
     async def generate_image(self, description: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Async wrapper around generate_image_sync.
+
+        The OpenAI call and the download are blocking, so they run in a worker
+        thread rather than on the event loop.
+        """
+        return await asyncio.to_thread(self.generate_image_sync, description)
+
+    def generate_image_sync(self, description: str) -> Tuple[Optional[str], Optional[str]]:
         """
         Generate an educational image using DALL-E.
         
@@ -126,16 +191,46 @@ class ImageGenerationService:
             - If failed: (None, error_message)
         """
         # Check cache first
-        cache_key = self._get_cache_key(description)
-        if cache_key in self._cache:
-            logger.info(f"Image found in cache: {cache_key}")
-            return self._cache[cache_key], None
-        
+        cache_key = self.cache_key(description)
+        cached = self._cached(cache_key)
+        if cached is not None:
+            logger.debug("Image found in cache: %s", cache_key)
+            return cached, None
+
+        # Single-flight: a concurrent request for the same picture waits for
+        # the first one instead of paying for a second DALL-E call.
+        with self._inflight_lock:
+            pending = self._inflight.get(cache_key)
+            if pending is None:
+                # A generation may have finished since the lookup above
+                with self._cache_lock:
+                    cached = self._cache.get(cache_key)
+                if cached is not None:
+                    return cached, None
+                self._inflight[cache_key] = future = Future()
+        if pending is not None:
+            logger.debug("Waiting for in-flight image: %s", cache_key)
+            return pending.result()
+
+        try:
+            result = self._create_image(description, cache_key)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._inflight_lock:
+                del self._inflight[cache_key]
+
+    def _create_image(self, description: str, cache_key: str) -> Tuple[Optional[str], Optional[str]]:
+        """Call DALL-E for an uncached description and proxy the result."""
         try:
             # Build optimized prompt
             dalle_prompt = self._build_dalle_prompt(description)
             
-            logger.info(f"Generating image: {description[:50]}...")
+            logger.info("Generating image: %s...", description[:50])
             
             # Call DALL-E API
             response = openai.images.generate(
@@ -152,15 +247,16 @@ class ImageGenerationService:
             dalle_url = response.data[0].url
 
             # Proxy: download immediately so the URL never expires
-            proxied = await download_and_cache_async(dalle_url)
-            image_url = proxied if proxied else dalle_url
-            if not proxied:
+            proxied = download_and_cache_sync(dalle_url, name=cache_key)
+            if proxied:
+                image_url = proxied
+                self._remember(cache_key, image_url)
+            else:
+                # The signed DALL-E URL expires within hours — serve it, never cache it
+                image_url = dalle_url
                 logger.warning("Image proxy failed; falling back to DALL-E URL")
 
-            # Cache the result
-            self._cache[cache_key] = image_url
-
-            logger.info(f"Image generated successfully: {cache_key}")
+            logger.info("Image generated successfully: %s", cache_key)
             return image_url, None
             
         except openai.BadRequestError as e:
@@ -178,57 +274,6 @@ class ImageGenerationService:
             logger.exception(error_msg)
             return None, error_msg
     
-    def generate_image_sync(self, description: str) -> Tuple[Optional[str], Optional[str]]:
-        """
-        Synchronous version of generate_image.
-        
-        For use in non-async contexts.
-        """
-        # Check cache first
-        cache_key = self._get_cache_key(description)
-        if cache_key in self._cache:
-            logger.info(f"Image found in cache: {cache_key}")
-            return self._cache[cache_key], None
-        
-        try:
-            dalle_prompt = self._build_dalle_prompt(description)
-            
-            logger.info(f"Generating image (sync): {description[:50]}...")
-            
-            response = openai.images.generate(
-                model=self.model,
-                prompt=dalle_prompt,
-                size=self.size,
-                quality=self.quality,
-                style=self.style,
-                n=1,
-                response_format="url"
-            )
-            
-            dalle_url = response.data[0].url
-
-            # Proxy: download immediately so the URL never expires
-            proxied = download_and_cache_sync(dalle_url)
-            image_url = proxied if proxied else dalle_url
-            if not proxied:
-                logger.warning("Image proxy failed; falling back to DALL-E URL")
-
-            # Enforce cache size limit
-            if len(self._cache) >= self.MAX_CACHE_SIZE:
-                oldest_key = next(iter(self._cache))
-                del self._cache[oldest_key]
-                logger.debug(f"Cache full, removed: {oldest_key}")
-
-            self._cache[cache_key] = image_url
-
-            logger.info(f"Image generated successfully: {cache_key}")
-            return image_url, None
-            
-        except Exception as e:
-            error_msg = f"Image generation failed: {str(e)}"
-            logger.exception(error_msg)
-            return None, error_msg
-    
     def get_placeholder_image(self, description: str) -> str:
         """
         Get a placeholder image URL when generation fails.
@@ -241,7 +286,8 @@ class ImageGenerationService:
     
     def clear_cache(self):
         """Clear the in-memory image cache."""
-        self._cache.clear()
+        with self._cache_lock:
+            self._cache.clear()
         logger.info("Image cache cleared")
 
 
@@ -275,13 +321,13 @@ def process_ai_response_with_images(
     }
     
     # Check for image request
-    image_description = image_service.extract_image_request(response_text)
+    image_description, cleaned_text = image_service.split_image_request(response_text)
     
     if image_description:
         result["has_image"] = True
         
         # Clean text for TTS
-        result["text"] = image_service.remove_image_marker(response_text)
+        result["text"] = cleaned_text
         
         # Generate image
         image_url, error = image_service.generate_image_sync(image_description)
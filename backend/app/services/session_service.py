@@ -3,92 +3,150 @@ Session Service for Learno Educational Backend
 """
 
 import logging
-from typing import Optional, Dict
-from datetime import datetime, timedelta, timezone
+import sys
+import threading
+import time
+from typing import Optional
+from datetime import datetime, timezone
 import uuid
+from collections import OrderedDict
 
 from app.config import settings
 from app.utils.exceptions import SessionNotFoundError, SessionExpiredError
 
 logger = logging.getLogger(__name__)
 
+# Idle seconds before a session expires; read once, compared against monotonic floats
+_TIMEOUT_S = float(settings.SESSION_TIMEOUT_SECONDS)
+
 
 class Session:
     """Represents a learning session"""
+
+    __slots__ = (
+        "session_id", "grade", "subject", "lesson",
+        "created_at", "last_activity", "is_complete",
+    )
     
     def __init__(self, grade: int, subject: str, lesson: str):
         self.session_id = str(uuid.uuid4())
         self.grade = grade
-        self.subject = subject
-        self.lesson = lesson
+        # Shared by every session on the same lesson
+        self.subject = sys.intern(subject)
+        self.lesson = sys.intern(lesson)
         self.created_at = datetime.now(timezone.utc)
-        self.last_activity = datetime.now(timezone.utc)
-        self.total_steps = 0
+        # time.monotonic() seconds — only ever compared, never shown
+        self.last_activity = time.monotonic()
         self.is_complete = False
     
-    def update_activity(self):
-        self.last_activity = datetime.now(timezone.utc)
+    def update_activity(self, now: Optional[float] = None):
+        self.last_activity = time.monotonic() if now is None else now
 
-    def is_expired(self) -> bool:
-        timeout = timedelta(seconds=settings.SESSION_TIMEOUT_SECONDS)
-        return datetime.now(timezone.utc) - self.last_activity > timeout
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        if now is None:
+            now = time.monotonic()
+        return now - self.last_activity > _TIMEOUT_S
 
 
 class SessionService:
-    """Manages sessions in memory"""
+    """Manages sessions in memory (LRU-bounded by settings.MAX_SESSIONS)"""
+
+    # Sessions removed per lock hold in cleanup_expired
+    REAP_BATCH = 1_000
     
     def __init__(self):
-        self._sessions: Dict[str, Session] = {}
+        # Least recently used first. Sync routes run in the threadpool and the
+        # sweep runs on the event loop, so every access holds _lock.
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
         logger.info("SessionService initialized")
     
     def create_session(self, grade: int, subject: str, lesson: str) -> Session:
         session = Session(grade, subject, lesson)
-        self._sessions[session.session_id] = session
-        logger.info(f"Session created: {session.session_id}")
+        evicted = None
+        with self._lock:
+            self._sessions[session.session_id] = session
+            if len(self._sessions) > settings.MAX_SESSIONS:
+                evicted, _ = self._sessions.popitem(last=False)
+        if evicted is not None:
+            logger.warning("Session limit reached, evicted: %s", evicted)
+        logger.info("Session created: %s", session.session_id)
         return session
     
     def get_session(self, session_id: str) -> Session:
-        session = self._sessions.get(session_id)
-        
-        if not session:
-            raise SessionNotFoundError(f"Session not found: {session_id}")
-        
-        if session.is_expired():
-            del self._sessions[session_id]
-            raise SessionExpiredError(f"Session expired: {session_id}")
-        
-        session.update_activity()
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                raise SessionNotFoundError(session_id)
+            
+            if session.is_expired(now):
+                del self._sessions[session_id]
+                raise SessionExpiredError(session_id)
+            
+            self._sessions.move_to_end(session_id)
+            session.update_activity(now)
         return session
     
     def update_session(self, session: Session):
+        # The object is already stored; only its LRU position needs refreshing
         session.update_activity()
-        self._sessions[session.session_id] = session
+        with self._lock:
+            try:
+                self._sessions.move_to_end(session.session_id)
+            except KeyError:
+                pass  # already deleted or evicted — don't resurrect it
     
     def delete_session(self, session_id: str):
-        if session_id in self._sessions:
-            del self._sessions[session_id]
-            logger.info(f"Session deleted: {session_id}")
+        with self._lock:
+            deleted = self._sessions.pop(session_id, None) is not None
+        if deleted:
+            logger.info("Session deleted: %s", session_id)
 
     def cleanup_expired(self) -> int:
-        """Remove all expired sessions from memory.  Returns count deleted."""
-        expired = [sid for sid, s in self._sessions.items() if s.is_expired()]
-        for sid in expired:
-            del self._sessions[sid]
-        if expired:
-            logger.info(f"Cleaned up {len(expired)} expired sessions")
-        return len(expired)
+        """
+        Remove expired sessions from memory.  Returns count deleted.
+
+        The dict is in last-activity order, so expired sessions sit at the
+        oldest end: the sweep pops from there and stops at the first live
+        one.  The lock is released every REAP_BATCH sessions so a large
+        backlog never stalls the request threads.
+        """
+        now = time.monotonic()
+        removed = 0
+        while True:
+            with self._lock:
+                batch = 0
+                while self._sessions and batch < self.REAP_BATCH:
+                    oldest = next(iter(self._sessions.values()))
+                    if not oldest.is_expired(now):
+                        break
+                    self._sessions.popitem(last=False)
+                    batch += 1
+            removed += batch
+            if batch < self.REAP_BATCH:
+                break
+        if removed:
+            logger.info("Cleaned up %s expired sessions", removed)
+        return removed
+
+    def session_ids(self) -> set:
+        """Ids of every session still held, expired or not."""
+        with self._lock:
+            return set(self._sessions)
 
     @property
     def active_count(self) -> int:
         """Number of non-expired sessions currently in memory."""
-        return sum(1 for s in self._sessions.values() if not s.is_expired())
+        now = time.monotonic()
+        with self._lock:
+            return sum(1 for s in self._sessions.values() if not s.is_expired(now))
 
 
-_session_service: Optional[SessionService] = None
+# Built at import: construction is cheap and has no external dependencies, and
+# it leaves no window for two threads to create separate stores.
+_session_service = SessionService()
 
 
 def get_session_service() -> SessionService:
-    global _session_service
-    if _session_service is None:
-        _session_service = SessionService()
     return _session_service
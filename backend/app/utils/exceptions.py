@@ -3,26 +3,46 @@ Custom Exceptions for Learno Educational Backend
 """
 
 
-class SessionNotFoundError(Exception):
+class LearnoError(Exception):
+    """Base for every error the API maps to a structured error response"""
+    __slots__ = ()
+
+
+class SessionNotFoundError(LearnoError):
     """Raised when session doesn't exist"""
-    pass
+    __slots__ = ("session_id",)
+
+    def __init__(self, session_id: str = ""):
+        super().__init__(session_id)
+        self.session_id = session_id
 
+    def __str__(self):
+        # Formatted only when a handler actually renders the message
+        return f"Session not found: {self.session_id}"
 
-class SessionExpiredError(Exception):
+
+class SessionExpiredError(LearnoError):
     """Raised when session has expired"""
-    pass
+    __slots__ = ("session_id",)
+
+    def __init__(self, session_id: str = ""):
+        super().__init__(session_id)
+        self.session_id = session_id
+
+    def __str__(self):
+        return f"Session expired: {self.session_id}"
 
 
-class InvalidInputError(Exception):
+class InvalidInputError(LearnoError):
     """Raised when input is invalid"""
-    pass
+    __slots__ = ()
 
 
-class LessonNotAvailableError(Exception):
+class LessonNotAvailableError(LearnoError):
     """Raised when lesson is not available"""
-    pass
+    __slots__ = ()
 
 
-class AIServiceError(Exception):
+class AIServiceError(LearnoError):
     """Raised when AI service fails"""
-    pass
+    __slots__ = ()
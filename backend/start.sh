@@ -15,5 +15,7 @@ exec uvicorn app.main:app \
     --host 0.0.0.0 \
     --port "${PORT:-8000}" \
     --workers "$WORKERS" \
+    --loop uvloop \
+    --http httptools \
     --proxy-headers \
     --forwarded-allow-ips "*"
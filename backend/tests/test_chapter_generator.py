@@ -358,3 +358,17 @@ def test_chapter_padded_to_five_concepts_when_gpt4_returns_three():
         chapter = generate_chapter(0, "math", "numbers_to_3", "Numbers to 3")
 
     assert len(chapter.concepts) == 5
+
+
+def test_generated_chapter_concept_lookups():
+    from app.ai.chapter_generator import generate_chapter
+
+    mock_client = _make_mock_ai_client(_make_gpt4_json("Numbers to 3"))
+
+    with patch("app.ai.openai_client.get_ai_client", return_value=mock_client):
+        chapter = generate_chapter(0, "math", "numbers_to_3", "Numbers to 3")
+
+    third = chapter.concepts[2]
+    assert chapter.get_concept(third.concept_id) is third
+    assert chapter.get_concept_by_order(third.order) is third
+    assert chapter.get_concept("missing") is None
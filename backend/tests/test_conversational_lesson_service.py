@@ -0,0 +1,107 @@
+"""
+Tests for ConversationalLessonService turn handling — streaming responses.
+
+The AI client is mocked so no real API key is needed.
+"""
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.services.conversational_lesson_service import (
+    ConversationContext,
+    ConversationalLessonService,
+    LearnoResponse,
+)
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _make_service(deltas):
+    ai_client = MagicMock()
+
+    async def stream_response(messages):
+        for delta in deltas:
+            yield delta
+
+    ai_client.stream_response = stream_response
+    with patch("app.services.conversational_lesson_service.get_ai_client", return_value=ai_client), \
+         patch("app.services.conversational_lesson_service.get_image_service"):
+        service = ConversationalLessonService()
+    service._contexts["s1"] = ConversationContext(
+        child_name="Sam",
+        grade=2,
+        subject="math",
+        topic="counting",
+        lesson_language="en",
+        lesson_stage="greeting",
+        topic_info={"title": "counting", "concepts": []},
+    )
+    return service
+
+
+async def _collect(service, transcript="yes"):
+    return [item async for item in service.stream_response("s1", transcript)]
+
+
+# ---------------------------------------------------------------------------
+# Streaming
+# ---------------------------------------------------------------------------
+
+class TestStreamResponse:
+    async def test_sentences_yielded_before_final_response(self):
+        service = _make_service(["Great job", "! Now", " count to three. What", " comes next?"])
+        items = await _collect(service)
+        assert items[:-1] == ["Great job!", "Now count to three.", "What comes next?"]
+        assert isinstance(items[-1], LearnoResponse)
+        assert items[-1].text == "Great job! Now count to three. What comes next?"
+
+    async def test_break_split_across_deltas(self):
+        service = _make_service(["One.", " Two! Three?", "\nFour"])
+        items = await _collect(service)
+        assert items[:-1] == ["One.", "Two!", "Three?", "Four"]
+
+    async def test_history_and_stage_updated(self):
+        service = _make_service(["Hello there!"])
+        await _collect(service, transcript="hi")
+        ctx = service._contexts["s1"]
+        assert ctx.lesson_stage == "warmup"
+        assert ctx.conversation_history[-2:] == [
+            {"role": "user", "content": "hi"},
+            {"role": "assistant", "content": "Hello there!"},
+        ]
+
+    async def test_markers_stripped_from_stream(self):
+        service = _make_service(["You did it! ", "[LESSON_COMPLETE]"])
+        items = await _collect(service)
+        assert items[:-1] == ["You did it!"]
+        assert items[-1].response_type == "celebration"
+        assert items[-1].is_lesson_complete
+
+    def test_unknown_session_fails_before_streaming(self):
+        service = _make_service([])
+        with pytest.raises(ValueError):
+            service.stream_response("missing", "hi")
+
+
+# ---------------------------------------------------------------------------
+# Context cleanup
+# ---------------------------------------------------------------------------
+
+class TestPruneContexts:
+    def test_contexts_without_a_session_are_dropped(self):
+        service = _make_service([])
+        service.session_service = MagicMock()
+        service.session_service.session_ids.return_value = set()
+        service._analytics_map["s1"] = ("child", 1)
+        assert service.prune_contexts() == 1
+        assert "s1" not in service._contexts
+        assert "s1" not in service._analytics_map
+
+    def test_live_contexts_kept(self):
+        service = _make_service([])
+        service.session_service = MagicMock()
+        service.session_service.session_ids.return_value = {"s1"}
+        assert service.prune_contexts() == 0
+        assert "s1" in service._contexts
@@ -209,3 +209,10 @@ def test_root_endpoint_returns_200(client):
     r = client.get("/")
     assert r.status_code == 200
     assert r.json()["status"] == "success"
+
+
+def test_teaching_flow_endpoint_returns_json(client):
+    r = client.get("/teaching-flow")
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/json"
+    assert r.json()["data"]["flow"]["3_respond"].startswith("POST")
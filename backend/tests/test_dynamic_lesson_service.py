@@ -5,9 +5,12 @@ Tests for DynamicLessonService — lesson flow state machine (OpenAI mocked).
 import pytest
 from unittest.mock import MagicMock, patch
 
-from app.services.dynamic_lesson_service import DynamicLessonService, TeachingState
+from app.ai.dynamic_prompt_builder import PROMPT_MAX_TOKENS
+from app.services.dynamic_lesson_service import (
+    DynamicLessonService, TeachingState, _CELEBRATION_IMAGE_PROMPT,
+)
 from app.services.session_service import SessionService
-from app.models.lesson_content import LessonPhase, ConceptPhase
+from app.models.lesson_content import LessonPhase, ConceptPhase, PracticeQuestion
 from app.utils.exceptions import LessonNotAvailableError
 
 
@@ -34,8 +37,7 @@ def service(ai_mock):
 
         # Image service stub
         img_svc = MagicMock()
-        img_svc.extract_image_request.return_value = None
-        img_svc.remove_image_marker.return_value = "Great! Let's learn counting."
+        img_svc.split_image_request.side_effect = lambda text: (None, text)
         img_svc.generate_image_sync.return_value = (None, None)
         img_mock.return_value = img_svc
 
@@ -98,6 +100,33 @@ class TestContinueTeaching:
         )
         assert state.concept_phase == ConceptPhase.EXPLANATION
 
+    def test_completed_concept_advances_without_recursing(self, service):
+        session, _ = service.start_lesson(grade=2, subject="math", lesson="counting")
+        state = service._get_state(session.session_id)
+        state.concept_phase = ConceptPhase.COMPLETED
+        with patch.object(service, "continue_teaching", wraps=service.continue_teaching) as spy:
+            spy(session.session_id)
+        assert spy.call_count == 1
+        assert state.current_concept_index == 1
+        assert state.concept_phase == ConceptPhase.EXPLANATION
+
+    def test_completed_last_concept_starts_review(self, service):
+        session, _ = service.start_lesson(grade=2, subject="math", lesson="counting")
+        state = service._get_state(session.session_id)
+        state.current_concept_index = state.chapter.total_concepts - 1
+        state.concept_phase = ConceptPhase.COMPLETED
+        service.continue_teaching(session.session_id)
+        assert state.lesson_phase == LessonPhase.CHAPTER_REVIEW
+
+    def test_chapter_resolved_once_per_session(self, service):
+        session, _ = service.start_lesson(grade=2, subject="math", lesson="counting")
+        state = service._get_state(session.session_id)
+        with patch.object(service, "_get_chapter_for_session") as resolve:
+            service.continue_teaching(session.session_id)
+            service.continue_teaching(session.session_id)
+        resolve.assert_not_called()
+        assert state.chapter.chapter_id == "counting_chapter"
+
     def test_continue_nonexistent_session_raises(self, service):
         from app.utils.exceptions import SessionNotFoundError
         with pytest.raises(SessionNotFoundError):
@@ -126,6 +155,22 @@ class TestProcessResponse:
         service.process_response(session.session_id, "5")
         assert state.total_correct == 1
 
+    def test_praise_generated_alongside_next_step(self, service, ai_mock):
+        session = self._start(service)
+        with patch.object(service._prefetch_pool, "submit",
+                          wraps=service._prefetch_pool.submit) as submit:
+            response = service.process_response(session.session_id, "5")
+        assert any(c.args[1] == "encouragement" for c in submit.call_args_list)
+        assert response.text.startswith("Great! Let's learn counting.\n\n")
+
+    def test_praise_is_not_served_from_the_reply_cache(self, service, ai_mock):
+        session = self._start(service)
+        service.process_response(session.session_id, "5")
+        praise_calls = [c for c in ai_mock.generate_response.call_args_list
+                        if c.kwargs.get("max_tokens") == PROMPT_MAX_TOKENS["encouragement"]]
+        assert praise_calls
+        assert not any(c.kwargs.get("cacheable") for c in praise_calls)
+
     def test_wrong_answer_records_wrong(self, service):
         session = self._start(service)
         state = service._get_state(session.session_id)
@@ -149,6 +194,12 @@ class TestProcessResponse:
         service.process_response(session.session_id, "I think it is 5 apples")
         assert state.total_correct == 1
 
+    def test_acceptable_word_in_sentence_matches(self, service):
+        session = self._start(service)
+        state = service._get_state(session.session_id)
+        service.process_response(session.session_id, "hmm I think five apples")
+        assert state.total_correct == 1
+
     def test_three_wrong_sets_needs_extra_help(self, service):
         session = self._start(service)
         state = service._get_state(session.session_id)
@@ -157,6 +208,18 @@ class TestProcessResponse:
             service.process_response(session.session_id, "wrong_answer_xyz")
         assert state.needs_extra_help
 
+    def test_content_answers_normalized_for_matching(self, service):
+        question = PracticeQuestion("How many?", " 5 ", [" FIVE", "5"], "Count!")
+        assert question.expected_answer == "5"
+        assert question.acceptable_answers == ("five", "5")
+        assert question.acceptable_set == frozenset({"five", "5"})
+        session = self._start(service)
+        state = service._get_state(session.session_id)
+        state.current_acceptable_answers = question.acceptable_answers
+        state.current_acceptable_set = question.acceptable_set
+        service.process_response(session.session_id, "Five")
+        assert state.total_correct == 1
+
 
 # ---------------------------------------------------------------------------
 # handle_silence
@@ -189,6 +252,216 @@ class TestEndLesson:
         service.end_lesson(session.session_id)
         assert session.session_id not in service._teaching_states
 
+    def test_idle_states_expire(self, service):
+        session, _ = service.start_lesson(grade=2, subject="math", lesson="counting")
+        service._teaching_states[session.session_id].last_active -= 10 ** 6
+        service._get_state("another-session")
+        assert session.session_id not in service._teaching_states
+
+    def test_state_count_is_capped(self, service):
+        service.MAX_TEACHING_STATES = 2
+        for sid in ("a", "b", "c"):
+            service._get_state(sid)
+        service._get_state("b")
+        service._get_state("d")
+        assert list(service._teaching_states) == ["b", "d"]
+
+    def test_concurrent_sessions_share_the_store_safely(self, service):
+        import threading
+        service.MAX_TEACHING_STATES = 16
+        errors = []
+
+        def worker(n):
+            try:
+                for i in range(200):
+                    service._get_state(f"{n}-{i % 20}")
+            except Exception as e:  # pragma: no cover - only on a race
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert errors == []
+        assert len(service._teaching_states) == 16
+
+
+# ---------------------------------------------------------------------------
+# JSON-mode replies
+# ---------------------------------------------------------------------------
+
+class TestJsonResponses:
+    def test_narration_lines_joined_and_image_from_content(self, service):
+        service.image_service.generate_image_sync.return_value = ("/img/apples.png", None)
+        text, image_url = service._process_json_response(
+            '{"narration_lines": ["Look at this! 👀", "  ", "How many apples? 🍎"]}',
+            "three red apples",
+        )
+        assert text == "Look at this! 👀\n\nHow many apples? 🍎"
+        assert image_url == "/img/apples.png"
+        service.image_service.generate_image_sync.assert_called_once_with("three red apples")
+
+    def test_prose_reply_falls_back_to_marker_parsing(self, service):
+        text, image_url = service._process_json_response("Great! Let's learn counting.", None)
+        assert text == "Great! Let's learn counting."
+        assert image_url is None
+
+    def test_truncated_reply_uses_authored_text(self, service):
+        text, _ = service._process_json_response(
+            '{"narration_lines": ["Your turn! Question 2! 🌟", "How many app',
+            None,
+            fallback_text="How many apples are there?",
+        )
+        assert text == "How many apples are there?"
+
+    def test_truncated_reply_keeps_complete_lines(self, service):
+        text, _ = service._process_json_response(
+            '{"narration_lines": ["Look at this! 👀", "Say \\"hi\\", friend!", "How ma', None
+        )
+        assert text == 'Look at this! 👀\n\nSay "hi", friend!'
+        assert "narration_lines" not in text
+
+    def test_truncated_practice_reply_is_not_narrated_raw(self, service, ai_mock):
+        session, _ = service.start_lesson(grade=2, subject="math", lesson="counting")
+        state = service._get_state(session.session_id)
+        state.concept_phase = ConceptPhase.GUIDED_PRACTICE
+        ai_mock.generate_response.return_value = '{"narration_lines": ["Great counting! 🌟", "Now'
+        response = service.continue_teaching(session.session_id)
+        assert "{" not in response.text
+        assert response.text == state.chapter.concepts[0].guided_questions[0].question_text
+
+    def test_practice_requests_json_mode(self, service, ai_mock):
+        session, _ = service.start_lesson(grade=2, subject="math", lesson="counting")
+        state = service._get_state(session.session_id)
+        state.concept_phase = ConceptPhase.GUIDED_PRACTICE
+        service.continue_teaching(session.session_id)
+        assert ai_mock.generate_response.call_args.kwargs["json_mode"] is True
+
+    def test_practice_picture_generated_alongside_text(self, service):
+        service.image_service.generate_image_sync.return_value = ("/img/q.png", None)
+        session, _ = service.start_lesson(grade=2, subject="math", lesson="counting")
+        state = service._get_state(session.session_id)
+        state.concept_phase = ConceptPhase.GUIDED_PRACTICE
+        response = service.continue_teaching(session.session_id)
+        assert response.image_url == "/img/q.png"
+        assert service.image_service.generate_image_sync.call_count == 1
+        assert service._pending_images == {}
+
+    def test_celebration_picture_started_before_text(self, service, ai_mock):
+        service.image_service.generate_image_sync.return_value = ("/img/party.png", None)
+        session, _ = service.start_lesson(grade=2, subject="math", lesson="counting")
+        state = service._get_state(session.session_id)
+        started = []
+        ai_mock.generate_response.side_effect = lambda *a, **k: (
+            started.append(dict(service._pending_images)) or "Hooray!"
+        )
+        response = service._do_celebration(session.session_id, state, state.chapter)
+        assert started and started[0]
+        assert response.image_url == "/img/party.png"
+        assert service.image_service.generate_image_sync.call_count == 1
+        assert service._pending_images == {}
+
+    def test_celebration_draws_only_the_fixed_picture(self, service, ai_mock):
+        service.image_service.split_image_request.side_effect = None
+        service.image_service.split_image_request.return_value = ("a golden trophy", "Hooray!")
+        service.image_service.generate_image_sync.side_effect = lambda prompt: ("/img/party.png", None)
+        session, _ = service.start_lesson(grade=2, subject="math", lesson="counting")
+        state = service._get_state(session.session_id)
+        service.image_service.generate_image_sync.reset_mock()
+        response = service._do_celebration(session.session_id, state, state.chapter)
+        assert response.image_url == "/img/party.png"
+        assert response.text == "Hooray!"
+        # The marker is stripped, not drawn — one generation, the fixed scene
+        service.image_service.generate_image_sync.assert_called_once_with(_CELEBRATION_IMAGE_PROMPT)
+
+
+# ---------------------------------------------------------------------------
+# Next-phase prefetch
+# ---------------------------------------------------------------------------
+
+class TestPrefetch:
+    def test_introduction_prefetches_explanation(self, service, ai_mock):
+        session, _ = service.start_lesson(grade=2, subject="math", lesson="counting")
+        service.continue_teaching(session.session_id)
+        kind, _, future = service._prefetched[session.session_id]
+        assert kind == "explanation"
+        future.result()
+        calls_before = ai_mock.generate_response.call_count
+
+        response = service.continue_teaching(session.session_id)
+
+        assert response.text
+        # The explanation came from the prefetch; only the visual prefetch was issued since.
+        service._prefetched[session.session_id][2].result()
+        assert ai_mock.generate_response.call_count == calls_before + 1
+        assert service._prefetched[session.session_id][0] == "visual"
+
+    def test_failed_prefetch_falls_back_to_direct_call(self, service, ai_mock):
+        session, _ = service.start_lesson(grade=2, subject="math", lesson="counting")
+        ai_mock.generate_response.side_effect = ["Great! Let's learn counting.", RuntimeError("boom")]
+        service.continue_teaching(session.session_id)
+        assert isinstance(service._prefetched[session.session_id][2].exception(), RuntimeError)
+        ai_mock.generate_response.side_effect = None
+
+        response = service.continue_teaching(session.session_id)
+        assert response.text
+
+    def test_queued_prefetch_is_cancelled_and_made_inline(self, service, ai_mock):
+        from concurrent.futures import Future
+        queued = Future()  # never picked up by a worker
+        text = service._background_text(queued, "explanation", [{"role": "user", "content": "x"}])
+        assert queued.cancelled()
+        assert text == "Great! Let's learn counting."
+        assert ai_mock.generate_response.call_count == 1
+
+    def test_images_do_not_share_the_text_pool(self, service):
+        service._start_image("s1", "three red apples")
+        assert service._pending_images["s1"]
+        assert service._image_pool is not service._prefetch_pool
+
+    def test_pending_images_are_per_session(self, service):
+        service.image_service.generate_image_sync.return_value = ("/img/apples.png", None)
+        service._start_image("s1", "three red apples")
+        assert service._take_image("s2", "three red apples") is None
+        assert service._content_image("s1", "three red apples") == "/img/apples.png"
+        assert service._pending_images == {}
+
+    def test_end_lesson_discards_pending_images(self, service):
+        session, _ = service.start_lesson(grade=2, subject="math", lesson="counting")
+        service._start_image(session.session_id, "three red apples")
+        service.end_lesson(session.session_id)
+        assert session.session_id not in service._pending_images
+
+    def test_end_lesson_discards_prefetch(self, service):
+        session, _ = service.start_lesson(grade=2, subject="math", lesson="counting")
+        service.continue_teaching(session.session_id)
+        service.end_lesson(session.session_id)
+        assert session.session_id not in service._prefetched
+
+    def test_concurrent_prefetches_share_the_map_safely(self, service):
+        import threading
+        messages = [{"role": "user", "content": "x"}]
+        errors = []
+
+        def worker(n):
+            try:
+                for i in range(100):
+                    sid = f"s{i % 5}"
+                    service._prefetch(sid, "explanation", messages)
+                    service._generate("explanation", messages, session_id=sid)
+                    service._discard_prefetch(sid)
+            except Exception as e:  # pragma: no cover - only on a race
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert errors == []
+        assert service._prefetched == {}
+
 
 # ---------------------------------------------------------------------------
 # TeachingState helpers
@@ -223,3 +496,24 @@ class TestTeachingState:
         state.reset_attempts()
         assert state.current_attempts == 0
         assert state.consecutive_wrong == 0
+
+
+# ---------------------------------------------------------------------------
+# Image prewarm
+# ---------------------------------------------------------------------------
+
+class TestPrewarmImages:
+    def test_every_unique_chapter_prompt_generated_once(self, service):
+        from app.models.lesson_content import get_counting_chapter
+        chapter = get_counting_chapter()
+        service.image_service.cache_key.side_effect = lambda p: p.lower()
+        count = service.prewarm_images(chapter)
+        prompts = {c.args[0] for c in service.image_service.generate_image_sync.call_args_list}
+        assert count == len(prompts) == service.image_service.generate_image_sync.call_count
+        assert chapter.concepts[0].visual_description in prompts
+
+    def test_failed_prompt_does_not_abort_prewarm(self, service):
+        from app.models.lesson_content import get_counting_chapter
+        service.image_service.cache_key.side_effect = lambda p: p
+        service.image_service.generate_image_sync.side_effect = RuntimeError("rate limited")
+        assert service.prewarm_images(get_counting_chapter()) > 0
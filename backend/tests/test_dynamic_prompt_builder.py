@@ -0,0 +1,123 @@
+"""
+Tests for dynamic_prompt_builder — message shape and prompt layout.
+"""
+
+import logging
+
+from app.ai.dynamic_prompt_builder import (
+    MAX_KEY_POINTS,
+    build_chapter_review_prompt,
+    build_explanation_prompt,
+    build_guided_practice_prompt,
+    build_hint_prompt,
+    build_independent_practice_prompt,
+)
+from app.models.lesson_content import Example, PracticeQuestion
+
+
+def _question(n: int, image_prompt=None) -> PracticeQuestion:
+    return PracticeQuestion(
+        question_text=f"What is {n} + 1?",
+        expected_answer=str(n + 1),
+        acceptable_answers=[str(n + 1)],
+        hint_text="Count up by one!",
+        image_prompt=image_prompt,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Shared system message
+# ---------------------------------------------------------------------------
+
+class TestSystemMessage:
+    def test_system_message_reused_across_builds(self):
+        first = build_independent_practice_prompt(_question(1), "Adding", 1, 1, grade=3)
+        second = build_chapter_review_prompt(_question(1), 1, 1, grade=3)
+        assert first[0] is second[0]
+        assert first[0]["role"] == "system"
+
+    def test_system_message_differs_per_subject(self):
+        math = build_chapter_review_prompt(_question(1), 1, 1, grade=2, subject="math")
+        arabic = build_chapter_review_prompt(_question(1), 1, 1, grade=2, subject="arabic")
+        assert math[0] is not arabic[0]
+        assert "Arabic" in arabic[0]["content"]
+
+
+# ---------------------------------------------------------------------------
+# Cacheable prefix
+# ---------------------------------------------------------------------------
+
+class TestCacheablePrefix:
+    def test_instructions_precede_per_turn_data(self):
+        messages = build_hint_prompt("5", "6", "Count up!", 0, False)
+        assert [m["role"] for m in messages] == ["system", "system", "user"]
+        assert "YOUR TASK" in messages[1]["content"]
+        assert "YOUR TASK" not in messages[2]["content"]
+
+    def test_prefix_identical_across_turns(self):
+        first = build_hint_prompt("5", "6", "Count up!", 0, False)
+        second = build_hint_prompt("9", "10", "Add one more!", 2, True)
+        assert first[:2] == second[:2]
+        assert first[2] != second[2]
+
+
+# ---------------------------------------------------------------------------
+# Explanation prompt
+# ---------------------------------------------------------------------------
+
+class TestExplanationPrompt:
+    def test_only_first_two_examples_rendered(self):
+        examples = [
+            Example(problem=f"{n} + 1", solution=str(n + 1), explanation="count on")
+            for n in range(4)
+        ]
+        messages = build_explanation_prompt(
+            "Adding", "Show, then ask.", ["Add means more", "Count on"], examples
+        )
+        user = messages[-1]["content"]
+        assert "- Add means more\n- Count on" in user
+        assert "\nExample: 0 + 1 → 1\nHow to explain: count on\n\nExample: 1 + 1 → 2" in user
+        assert "2 + 1" not in user
+
+    def test_key_points_capped(self):
+        points = [f"point {n}" for n in range(MAX_KEY_POINTS + 3)]
+        user = build_explanation_prompt("Adding", "Show.", points, [])[-1]["content"]
+        assert f"- point {MAX_KEY_POINTS - 1}" in user
+        assert f"- point {MAX_KEY_POINTS}" not in user
+
+    def test_oversized_prompt_logs_warning(self, caplog):
+        with caplog.at_level(logging.WARNING, logger="app.ai.dynamic_prompt_builder"):
+            build_explanation_prompt("Adding", "x" * 5000, [], [])
+        assert "Oversized prompt" in caplog.text
+
+
+# ---------------------------------------------------------------------------
+# Hint prompt
+# ---------------------------------------------------------------------------
+
+class TestHintPrompt:
+    def test_hint_strength_escalates_with_attempts(self):
+        def strength(attempt):
+            user = build_hint_prompt("5", "6", "Count up!", attempt, False)[-1]["content"]
+            return user.split("HINT STRENGTH: ")[1].splitlines()[0]
+
+        assert strength(0) == strength(1) == "very gentle"
+        assert strength(2) == "clearer with more help"
+        assert strength(5) == "very direct with strong clue"
+
+    def test_silence_and_extra_help_notes(self):
+        user = build_hint_prompt("", "6", "Count up!", 1, True, is_silence=True)[-1]["content"]
+        assert "SILENCE HANDLING" in user
+        assert "EXTRA SUPPORT MODE" in user
+
+
+# ---------------------------------------------------------------------------
+# Practice prompts
+# ---------------------------------------------------------------------------
+
+class TestPracticePrompts:
+    def test_picture_line_only_when_image_given(self):
+        with_image = build_guided_practice_prompt(_question(1, image_prompt="two apples"), "Adding")
+        without = build_independent_practice_prompt(_question(1), "Adding", 1, 3)
+        assert "PICTURE: two apples" in with_image[-1]["content"]
+        assert "PICTURE" not in without[-1]["content"]
@@ -255,3 +255,141 @@ def test_cleanup_only_removes_png_files(tmp_path, monkeypatch):
     proxy_mod.cleanup_old_images(days=7)
 
     assert txt_file.exists()
+
+
+# =============================================================================
+# 5. Named images — persistent tier of the image cache
+# =============================================================================
+
+def test_named_download_is_found_by_cached_image_url(tmp_path, monkeypatch):
+    import app.services.image_proxy as proxy_mod
+
+    monkeypatch.setattr(proxy_mod, "STATIC_DIR", tmp_path / "images")
+
+    mock_response = MagicMock()
+    mock_response.content = FAKE_CONTENT
+    mock_response.raise_for_status = MagicMock()
+
+    mock_client_instance = MagicMock()
+    mock_client_instance.get.return_value = mock_response
+    mock_client_instance.__enter__ = MagicMock(return_value=mock_client_instance)
+    mock_client_instance.__exit__ = MagicMock(return_value=False)
+
+    assert proxy_mod.cached_image_url("abc123") is None
+    with patch("httpx.Client", return_value=mock_client_instance):
+        result = proxy_mod.download_and_cache_sync(FAKE_URL, name="abc123")
+
+    assert result == "/static/generated_images/abc123.png"
+    assert proxy_mod.cached_image_url("abc123") == result
+    assert not list((tmp_path / "images").glob("*.tmp"))
+
+
+
+def test_concurrent_saves_use_distinct_temp_files(tmp_path, monkeypatch):
+    import app.services.image_proxy as proxy_mod
+
+    sources = []
+    real_replace = proxy_mod.os.replace
+    monkeypatch.setattr(proxy_mod.os, "replace",
+                        lambda src, dst: sources.append(src) or real_replace(src, dst))
+
+    target = tmp_path / "abc123.png"
+    proxy_mod._save(target, FAKE_CONTENT)
+    proxy_mod._save(target, FAKE_CONTENT)
+
+    assert len(set(sources)) == 2
+    assert target.read_bytes() == FAKE_CONTENT
+    assert not list(tmp_path.glob("*.tmp"))
+
+def test_image_service_reuses_image_saved_by_another_worker(tmp_path, monkeypatch):
+    import app.services.image_proxy as proxy_mod
+    from app.services.image_service import ImageGenerationService
+
+    images_dir = tmp_path / "images"
+    images_dir.mkdir()
+    monkeypatch.setattr(proxy_mod, "STATIC_DIR", images_dir)
+    monkeypatch.chdir(tmp_path)
+
+    service = ImageGenerationService()
+    key = service.cache_key("Three  red apples ")
+    (images_dir / f"{key}.png").write_bytes(FAKE_CONTENT)
+
+    with patch("openai.images.generate") as generate:
+        url, error = service.generate_image_sync("three red apples")
+
+    generate.assert_not_called()
+    assert error is None
+    assert url == f"/static/generated_images/{key}.png"
+
+
+def test_image_service_does_not_cache_expiring_dalle_url(tmp_path, monkeypatch):
+    import app.services.image_service as image_mod
+    from app.services.image_service import ImageGenerationService
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(image_mod, "download_and_cache_sync", lambda url, name=None: None)
+    service = ImageGenerationService()
+
+    dalle = MagicMock()
+    dalle.data = [MagicMock(url="https://oaidalleapi.example/signed.png")]
+    with patch("openai.images.generate", return_value=dalle) as generate:
+        first, _ = service.generate_image_sync("a blue kite")
+        second, _ = service.generate_image_sync("a blue kite")
+
+    assert first == second == "https://oaidalleapi.example/signed.png"
+    assert generate.call_count == 2
+    assert len(service._cache) == 0
+
+
+def test_concurrent_requests_for_one_image_share_a_single_generation(tmp_path, monkeypatch):
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    from app.services.image_service import ImageGenerationService
+
+    monkeypatch.chdir(tmp_path)
+    service = ImageGenerationService()
+    release = threading.Event()
+
+    def slow_create(description, cache_key):
+        release.wait(5)
+        service._remember(cache_key, "/img/kite.png")
+        return "/img/kite.png", None
+
+    with patch.object(service, "_create_image", side_effect=slow_create) as create, \
+         ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(service.generate_image_sync, "a blue kite") for _ in range(3)]
+        while not service._inflight:
+            pass
+        release.set()
+        results = [f.result(timeout=5) for f in futures]
+
+    assert results == [("/img/kite.png", None)] * 3
+    assert create.call_count == 1
+    assert service._inflight == {}
+
+
+async def test_async_generate_image_shares_the_sync_path(tmp_path, monkeypatch):
+    from app.services.image_service import ImageGenerationService
+
+    monkeypatch.chdir(tmp_path)
+    service = ImageGenerationService()
+    with patch.object(service, "generate_image_sync", return_value=("/img/a.png", None)) as sync:
+        assert await service.generate_image("a kite") == ("/img/a.png", None)
+    sync.assert_called_once_with("a kite")
+
+
+# =============================================================================
+# 6. Image marker parsing
+# =============================================================================
+
+def test_split_image_request_extracts_and_strips_in_one_pass(tmp_path, monkeypatch):
+    """The first marker's description is returned and every marker is removed."""
+    monkeypatch.chdir(tmp_path)
+    from app.services.image_service import ImageGenerationService
+    service = ImageGenerationService()
+
+    text = "Look! [GENERATE_IMAGE: two red apples ] Count them. [generate_image: a tree]"
+    description, cleaned = service.split_image_request(text)
+    assert description == "two red apples"
+    assert cleaned == service.remove_image_marker(text)
+    assert service.split_image_request("No picture here. ") == (None, "No picture here. ")
@@ -25,8 +25,7 @@ def _mock_ai():
 
 def _mock_img():
     m = MagicMock()
-    m.extract_image_request.return_value = None
-    m.remove_image_marker.return_value = CANNED_AI
+    m.split_image_request.side_effect = lambda text: (None, text)
     m.generate_image_sync.return_value = (None, None)
     return m
 
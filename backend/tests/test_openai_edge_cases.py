@@ -4,8 +4,10 @@ Tests for OpenAI client edge cases and error handling.
 All tests mock the openai library so no real API key is needed.
 """
 
+import threading
+
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 import openai
 
 from app.ai.openai_client import LearnoAIClient, get_ai_client
@@ -36,17 +38,12 @@ class TestAuthenticationErrors:
 
     def test_invalid_key_raises_ai_service_error(self):
         client = _make_client()
-        with patch.object(client._tts if hasattr(client, "_tts") else openai.chat.completions,
-                          "create",
+        with patch.object(client._client.chat.completions, "create",
                           side_effect=openai.AuthenticationError(
                               message="Invalid", response=MagicMock(), body={}
                           )):
             with pytest.raises(AIServiceError, match="Invalid OpenAI API key"):
-                with patch("openai.chat.completions.create",
-                           side_effect=openai.AuthenticationError(
-                               message="Invalid", response=MagicMock(), body={}
-                           )):
-                    client.generate_response(MESSAGES)
+                client.generate_response(MESSAGES)
 
 
 # ---------------------------------------------------------------------------
@@ -56,19 +53,19 @@ class TestAuthenticationErrors:
 class TestRateLimitErrors:
     def test_rate_limit_raises_ai_service_error(self):
         client = _make_client()
-        with patch("openai.chat.completions.create",
-                   side_effect=openai.RateLimitError(
-                       message="Rate limit", response=MagicMock(), body={}
-                   )):
+        with patch.object(client._client.chat.completions, "create",
+                          side_effect=openai.RateLimitError(
+                              message="Rate limit", response=MagicMock(), body={}
+                          )):
             with pytest.raises(AIServiceError, match="rate limit"):
                 client.generate_response(MESSAGES)
 
     def test_rate_limit_json_mode(self):
         client = _make_client()
-        with patch("openai.chat.completions.create",
-                   side_effect=openai.RateLimitError(
-                       message="Rate limit", response=MagicMock(), body={}
-                   )):
+        with patch.object(client._client.chat.completions, "create",
+                          side_effect=openai.RateLimitError(
+                              message="Rate limit", response=MagicMock(), body={}
+                          )):
             with pytest.raises(AIServiceError, match="rate limit"):
                 client.generate_json_response(MESSAGES)
 
@@ -80,15 +77,15 @@ class TestRateLimitErrors:
 class TestTimeoutErrors:
     def test_timeout_raises_ai_service_error(self):
         client = _make_client()
-        with patch("openai.chat.completions.create",
-                   side_effect=openai.APITimeoutError(request=MagicMock())):
+        with patch.object(client._client.chat.completions, "create",
+                          side_effect=openai.APITimeoutError(request=MagicMock())):
             with pytest.raises(AIServiceError, match="timed out"):
                 client.generate_response(MESSAGES)
 
     def test_timeout_in_json_mode(self):
         client = _make_client()
-        with patch("openai.chat.completions.create",
-                   side_effect=openai.APITimeoutError(request=MagicMock())):
+        with patch.object(client._client.chat.completions, "create",
+                          side_effect=openai.APITimeoutError(request=MagicMock())):
             with pytest.raises(AIServiceError, match="timed out"):
                 client.generate_json_response(MESSAGES)
 
@@ -100,15 +97,15 @@ class TestTimeoutErrors:
 class TestConnectionErrors:
     def test_connection_error_raises_ai_service_error(self):
         client = _make_client()
-        with patch("openai.chat.completions.create",
-                   side_effect=openai.APIConnectionError(request=MagicMock())):
+        with patch.object(client._client.chat.completions, "create",
+                          side_effect=openai.APIConnectionError(request=MagicMock())):
             with pytest.raises(AIServiceError, match="reach OpenAI"):
                 client.generate_response(MESSAGES)
 
     def test_connection_error_json_mode(self):
         client = _make_client()
-        with patch("openai.chat.completions.create",
-                   side_effect=openai.APIConnectionError(request=MagicMock())):
+        with patch.object(client._client.chat.completions, "create",
+                          side_effect=openai.APIConnectionError(request=MagicMock())):
             with pytest.raises(AIServiceError, match="reach OpenAI"):
                 client.generate_json_response(MESSAGES)
 
@@ -120,19 +117,19 @@ class TestConnectionErrors:
 class TestInternalServerErrors:
     def test_server_error_raises_ai_service_error(self):
         client = _make_client()
-        with patch("openai.chat.completions.create",
-                   side_effect=openai.InternalServerError(
-                       message="Server error", response=MagicMock(), body={}
-                   )):
+        with patch.object(client._client.chat.completions, "create",
+                          side_effect=openai.InternalServerError(
+                              message="Server error", response=MagicMock(), body={}
+                          )):
             with pytest.raises(AIServiceError, match="server error"):
                 client.generate_response(MESSAGES)
 
     def test_server_error_json_mode(self):
         client = _make_client()
-        with patch("openai.chat.completions.create",
-                   side_effect=openai.InternalServerError(
-                       message="Server error", response=MagicMock(), body={}
-                   )):
+        with patch.object(client._client.chat.completions, "create",
+                          side_effect=openai.InternalServerError(
+                              message="Server error", response=MagicMock(), body={}
+                          )):
             with pytest.raises(AIServiceError, match="server error"):
                 client.generate_json_response(MESSAGES)
 
@@ -149,19 +146,19 @@ class TestEmptyResponse:
 
     def test_empty_content_raises_ai_service_error(self):
         client = _make_client()
-        with patch("openai.chat.completions.create", return_value=self._mock_response("")):
+        with patch.object(client._client.chat.completions, "create", return_value=self._mock_response("")):
             with pytest.raises(AIServiceError, match="Empty response"):
                 client.generate_response(MESSAGES)
 
     def test_none_content_raises_ai_service_error(self):
         client = _make_client()
-        with patch("openai.chat.completions.create", return_value=self._mock_response(None)):
+        with patch.object(client._client.chat.completions, "create", return_value=self._mock_response(None)):
             with pytest.raises(AIServiceError, match="Empty response"):
                 client.generate_response(MESSAGES)
 
     def test_empty_json_content_raises(self):
         client = _make_client()
-        with patch("openai.chat.completions.create", return_value=self._mock_response("")):
+        with patch.object(client._client.chat.completions, "create", return_value=self._mock_response("")):
             with pytest.raises(AIServiceError, match="Empty"):
                 client.generate_json_response(MESSAGES)
 
@@ -178,18 +175,102 @@ class TestSuccessfulResponses:
 
     def test_normal_response_returned(self):
         client = _make_client()
-        with patch("openai.chat.completions.create",
-                   return_value=self._mock_response("  Hello!  ")):
+        with patch.object(client._client.chat.completions, "create",
+                          return_value=self._mock_response("  Hello!  ")):
             result = client.generate_response(MESSAGES)
         assert result == "Hello!"
 
     def test_json_response_returned(self):
         client = _make_client()
-        with patch("openai.chat.completions.create",
-                   return_value=self._mock_response('{"key": "value"}')):
+        with patch.object(client._client.chat.completions, "create",
+                          return_value=self._mock_response('{"key": "value"}')):
             result = client.generate_json_response(MESSAGES)
         assert result == '{"key": "value"}'
 
+    def test_client_reused_across_calls(self):
+        client = _make_client()
+        pooled = client._client
+        with patch.object(pooled.chat.completions, "create",
+                          return_value=self._mock_response("Hi")) as create:
+            client.generate_response(MESSAGES)
+            client.generate_response(MESSAGES)
+        assert client._client is pooled
+        assert create.call_count == 2
+
+    def test_transient_errors_retried_in_sdk(self):
+        from app.config import settings
+        client = _make_client()
+        assert client._client.max_retries == settings.OPENAI_MAX_RETRIES
+        assert client._async_client.max_retries == settings.OPENAI_MAX_RETRIES
+
+    def test_cacheable_response_served_from_cache(self):
+        client = _make_client()
+        with patch.object(client._client.chat.completions, "create",
+                          return_value=self._mock_response("Welcome!")) as create:
+            first = client.generate_response(MESSAGES, cacheable=True)
+            second = client.generate_response(MESSAGES, cacheable=True)
+        assert first == second == "Welcome!"
+        assert create.call_count == 1
+
+    def test_cache_bounded_under_concurrent_writers(self, monkeypatch):
+        import app.ai.openai_client as client_mod
+        monkeypatch.setattr(client_mod, "_RESPONSE_CACHE_MAX_SIZE", 4)
+        client = _make_client()
+        errors = []
+
+        def worker(n):
+            try:
+                for i in range(50):
+                    client.generate_response([{"role": "user", "content": f"{n}-{i}"}], cacheable=True)
+            except Exception as e:  # pragma: no cover - only on a race
+                errors.append(e)
+
+        with patch.object(client._client.chat.completions, "create",
+                          return_value=self._mock_response("Hi")):
+            threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        assert errors == []
+        assert len(client._response_cache) == 4
+
+    def test_model_override_used_for_call(self):
+        client = _make_client()
+        with patch.object(client._client.chat.completions, "create",
+                          return_value=self._mock_response("Hi")) as create:
+            client.generate_response(MESSAGES, model="gpt-4o-mini")
+            client.generate_response(MESSAGES)
+        assert create.call_args_list[0].kwargs["model"] == "gpt-4o-mini"
+        assert create.call_args_list[1].kwargs["model"] == client.model
+
+    def test_max_tokens_override_used_for_call(self):
+        client = _make_client()
+        with patch.object(client._client.chat.completions, "create",
+                          return_value=self._mock_response("Hi")) as create:
+            client.generate_response(MESSAGES, max_tokens=40)
+            client.generate_response(MESSAGES)
+        assert create.call_args_list[0].kwargs["max_tokens"] == 40
+        assert create.call_args_list[1].kwargs["max_tokens"] == client.max_tokens
+
+    def test_json_mode_requests_json_object(self):
+        client = _make_client()
+        with patch.object(client._client.chat.completions, "create",
+                          return_value=self._mock_response('{"a": 1}')) as create:
+            client.generate_response(MESSAGES, json_mode=True)
+            client.generate_response(MESSAGES)
+        assert create.call_args_list[0].kwargs["response_format"] == {"type": "json_object"}
+        assert "response_format" not in create.call_args_list[1].kwargs
+
+    def test_cache_keyed_on_message_content(self):
+        client = _make_client()
+        other = [{"role": "user", "content": "Goodbye"}]
+        with patch.object(client._client.chat.completions, "create",
+                          return_value=self._mock_response("Hi")) as create:
+            client.generate_response(MESSAGES, cacheable=True)
+            client.generate_response(other, cacheable=True)
+        assert create.call_count == 2
+
     def test_json_fallback_on_mode_failure(self):
         """If JSON mode fails with a generic error, retries without response_format."""
         client = _make_client()
@@ -203,12 +284,44 @@ class TestSuccessfulResponses:
             mock_resp.choices[0].message.content = "fallback text"
             return mock_resp
 
-        with patch("openai.chat.completions.create", side_effect=side_effect):
+        with patch.object(client._client.chat.completions, "create", side_effect=side_effect):
             result = client.generate_json_response(MESSAGES)
         assert result == "fallback text"
         assert call_count["n"] == 2  # first attempt + retry
 
 
+# ---------------------------------------------------------------------------
+# Streaming responses
+# ---------------------------------------------------------------------------
+
+def _stream_of(*deltas):
+    async def stream():
+        for delta in deltas:
+            chunk = MagicMock()
+            chunk.choices[0].delta.content = delta
+            yield chunk
+    return stream()
+
+
+class TestStreamResponse:
+    async def test_stream_yields_deltas_and_skips_empty(self):
+        client = _make_client()
+        create = AsyncMock(return_value=_stream_of("Hi", None, " there", "!"))
+        with patch.object(client._async_client.chat.completions, "create", create):
+            deltas = [d async for d in client.stream_response(MESSAGES)]
+        assert deltas == ["Hi", " there", "!"]
+        assert create.call_args.kwargs["stream"] is True
+
+    async def test_stream_rate_limit_raises_ai_service_error(self):
+        client = _make_client()
+        create = AsyncMock(side_effect=openai.RateLimitError(
+            message="Rate limit", response=MagicMock(), body={}
+        ))
+        with patch.object(client._async_client.chat.completions, "create", create):
+            with pytest.raises(AIServiceError, match="rate limit"):
+                [d async for d in client.stream_response(MESSAGES)]
+
+
 # ---------------------------------------------------------------------------
 # Singleton
 # ---------------------------------------------------------------------------
@@ -218,3 +331,31 @@ class TestSingleton:
         c1 = get_ai_client()
         c2 = get_ai_client()
         assert c1 is c2
+
+    def test_concurrent_first_calls_build_one_client(self, monkeypatch):
+        import app.ai.openai_client as oc
+        monkeypatch.setattr(oc, "_ai_client", None)
+        barrier = threading.Barrier(8)
+        results = []
+
+        def worker():
+            barrier.wait()
+            results.append(get_ai_client())
+
+        with patch.object(oc, "LearnoAIClient", wraps=LearnoAIClient) as ctor:
+            threads = [threading.Thread(target=worker) for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        assert ctor.call_count == 1
+        assert all(r is results[0] for r in results)
+
+    def test_client_created_at_startup(self):
+        from fastapi.testclient import TestClient
+        import app.ai.openai_client as oc
+        from app.main import app
+
+        with patch.object(oc, "get_ai_client", wraps=get_ai_client) as warm_up:
+            with TestClient(app):
+                warm_up.assert_called_once_with()
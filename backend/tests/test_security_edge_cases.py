@@ -287,3 +287,23 @@ def test_logout_with_nonexistent_token_returns_204(client):
     """Logging out a token that never existed should succeed silently."""
     r = client.post(f"{API}/logout", json={"refresh_token": "nonexistent-token-value"})
     assert r.status_code == 204
+
+
+# ---------------------------------------------------------------------------
+# CORS preflight
+# ---------------------------------------------------------------------------
+
+def test_cors_preflight_allows_used_methods(client):
+    r = client.options(
+        f"{API}/login",
+        headers={"Origin": "https://example.com", "Access-Control-Request-Method": "POST"},
+    )
+    assert r.status_code == 200
+
+
+def test_cors_preflight_rejects_unused_methods(client):
+    r = client.options(
+        f"{API}/login",
+        headers={"Origin": "https://example.com", "Access-Control-Request-Method": "PATCH"},
+    )
+    assert r.status_code == 400
@@ -5,7 +5,6 @@ Tests for SessionService lifecycle — create, get, expire, cleanup.
 import time
 import pytest
 from unittest.mock import patch
-from datetime import timedelta, datetime, timezone
 
 from app.services.session_service import Session, SessionService
 from app.utils.exceptions import SessionNotFoundError, SessionExpiredError
@@ -23,6 +22,12 @@ def make_session(service: SessionService) -> Session:
     return service.create_session(grade=2, subject="math", lesson="counting")
 
 
+def expire(service: SessionService, session: Session):
+    """Age a session past the timeout, moving it to the idle end as real idling would."""
+    session.last_activity = time.monotonic() - 99999
+    service._sessions.move_to_end(session.session_id, last=False)
+
+
 # ---------------------------------------------------------------------------
 # Session creation
 # ---------------------------------------------------------------------------
@@ -75,15 +80,22 @@ class TestSessionRetrieval:
         with pytest.raises(SessionNotFoundError):
             svc.get_session("nonexistent-id")
 
+    def test_not_found_error_carries_session_id(self):
+        svc = make_service()
+        with pytest.raises(SessionNotFoundError) as exc_info:
+            svc.get_session("missing-id")
+        assert exc_info.value.session_id == "missing-id"
+        assert str(exc_info.value) == "Session not found: missing-id"
+
     def test_get_updates_last_activity(self):
         svc = make_service()
         s = make_session(svc)
         original_time = s.last_activity
         # Shift last_activity back slightly to detect the update
-        s.last_activity = original_time - timedelta(seconds=5)
+        s.last_activity = original_time - 5
         svc.get_session(s.session_id)
         updated = svc._sessions[s.session_id]
-        assert updated.last_activity >= original_time - timedelta(seconds=1)
+        assert updated.last_activity >= original_time
 
 
 # ---------------------------------------------------------------------------
@@ -95,14 +107,14 @@ class TestSessionExpiry:
         svc = make_service()
         s = make_session(svc)
         # Force expiry by backdating last_activity
-        s.last_activity = datetime.now(timezone.utc) - timedelta(seconds=99999)
+        s.last_activity = time.monotonic() - 99999
         with pytest.raises(SessionExpiredError):
             svc.get_session(s.session_id)
 
     def test_expired_session_removed_from_store(self):
         svc = make_service()
         s = make_session(svc)
-        s.last_activity = datetime.now(timezone.utc) - timedelta(seconds=99999)
+        s.last_activity = time.monotonic() - 99999
         with pytest.raises(SessionExpiredError):
             svc.get_session(s.session_id)
         assert s.session_id not in svc._sessions
@@ -115,7 +127,7 @@ class TestSessionExpiry:
     def test_is_expired_true_when_timeout_exceeded(self):
         svc = make_service()
         s = make_session(svc)
-        s.last_activity = datetime.now(timezone.utc) - timedelta(seconds=99999)
+        s.last_activity = time.monotonic() - 99999
         assert s.is_expired()
 
 
@@ -145,7 +157,7 @@ class TestCleanupExpired:
         svc = make_service()
         alive = make_session(svc)
         dead = make_session(svc)
-        dead.last_activity = datetime.now(timezone.utc) - timedelta(seconds=99999)
+        expire(svc, dead)
 
         removed = svc.cleanup_expired()
         assert removed == 1
@@ -162,10 +174,46 @@ class TestCleanupExpired:
         svc = make_service()
         for _ in range(5):
             s = make_session(svc)
-            s.last_activity = datetime.now(timezone.utc) - timedelta(seconds=99999)
+            s.last_activity = time.monotonic() - 99999
         assert svc.cleanup_expired() == 5
         assert len(svc._sessions) == 0
 
+    def test_cleanup_stops_at_first_live_session(self):
+        svc = make_service()
+        dead = make_session(svc)
+        alive = make_session(svc)
+        expire(svc, dead)
+        with patch.object(Session, "is_expired", autospec=True,
+                          side_effect=lambda s, now=None: s is dead) as is_expired:
+            assert svc.cleanup_expired() == 1
+        # The oldest end is walked, never the whole dict
+        assert is_expired.call_count == 2
+        assert list(svc._sessions) == [alive.session_id]
+
+    def test_cleanup_releases_lock_between_batches(self):
+        svc = make_service()
+        for _ in range(7):
+            expire(svc, make_session(svc))
+        alive = make_session(svc)
+        acquisitions = []
+
+        class CountingLock:
+            def __init__(self, lock):
+                self._lock = lock
+
+            def __enter__(self):
+                acquisitions.append(len(svc._sessions))
+                return self._lock.__enter__()
+
+            def __exit__(self, *exc):
+                return self._lock.__exit__(*exc)
+
+        svc._lock = CountingLock(svc._lock)
+        with patch.object(SessionService, "REAP_BATCH", 3):
+            assert svc.cleanup_expired() == 7
+        assert acquisitions == [8, 5, 2]
+        assert list(svc._sessions) == [alive.session_id]
+
 
 # ---------------------------------------------------------------------------
 # Active count
@@ -177,7 +225,7 @@ class TestActiveCount:
         s1 = make_session(svc)
         s2 = make_session(svc)
         dead = make_session(svc)
-        dead.last_activity = datetime.now(timezone.utc) - timedelta(seconds=99999)
+        dead.last_activity = time.monotonic() - 99999
         assert svc.active_count == 2
 
 
@@ -193,3 +241,87 @@ class TestUpdateSession:
         svc.update_session(s)
         fetched = svc.get_session(s.session_id)
         assert fetched.is_complete
+
+
+# ---------------------------------------------------------------------------
+# Session limit
+# ---------------------------------------------------------------------------
+
+class TestSessionLimit:
+    def test_least_recently_used_session_evicted(self):
+        svc = make_service()
+        with patch("app.services.session_service.settings.MAX_SESSIONS", 2):
+            first = make_session(svc)
+            second = make_session(svc)
+            svc.get_session(first.session_id)
+            third = make_session(svc)
+        assert list(svc._sessions) == [first.session_id, third.session_id]
+        with pytest.raises(SessionNotFoundError):
+            svc.get_session(second.session_id)
+
+
+# ---------------------------------------------------------------------------
+# Background sweep
+# ---------------------------------------------------------------------------
+
+class TestSessionSweep:
+    def test_background_sweep_drops_expired_sessions(self):
+        from fastapi.testclient import TestClient
+        from app.main import app
+        from app.services.session_service import get_session_service
+
+        svc = get_session_service()
+        dead = make_session(svc)
+        expire(svc, dead)
+        with patch("app.main.settings.SESSION_REAP_INTERVAL_SECONDS", 0.01), TestClient(app):
+            deadline = time.monotonic() + 2
+            while dead.session_id in svc._sessions and time.monotonic() < deadline:
+                time.sleep(0.01)
+        assert dead.session_id not in svc._sessions
+
+    def test_sweep_is_safe_alongside_concurrent_requests(self):
+        import threading
+        svc = make_service()
+        errors = []
+
+        def churn():
+            try:
+                for _ in range(500):
+                    s = make_session(svc)
+                    svc.get_session(s.session_id)
+                    svc.delete_session(s.session_id)
+            except Exception as e:  # pragma: no cover - failure path
+                errors.append(e)
+
+        threads = [threading.Thread(target=churn) for _ in range(4)]
+        for t in threads:
+            t.start()
+        while any(t.is_alive() for t in threads):
+            svc.cleanup_expired()
+        for t in threads:
+            t.join()
+        assert errors == []
+        assert len(svc._sessions) == 0
+
+
+# ---------------------------------------------------------------------------
+# Error responses
+# ---------------------------------------------------------------------------
+
+class TestSessionErrorResponses:
+    async def test_session_errors_map_to_status_and_state(self):
+        import orjson
+        from app.main import learno_error_handler
+        from app.utils.exceptions import LearnoError
+
+        missing = await learno_error_handler(None, SessionNotFoundError("abc"))
+        expired = await learno_error_handler(None, SessionExpiredError("abc"))
+        unknown = await learno_error_handler(None, LearnoError("boom"))
+
+        assert missing.status_code == 404
+        assert orjson.loads(missing.body) == {
+            "status": "error", "message": "Session not found: abc", "state": "SESSION_NOT_FOUND",
+        }
+        assert expired.status_code == 410
+        assert orjson.loads(expired.body)["state"] == "SESSION_EXPIRED"
+        assert unknown.status_code == 500